@@ -1,82 +1,381 @@
-from anthropic import Anthropic
-from typing import List, Dict
+import asyncio
+import copy
+import itertools
+import json
+import time
+from typing import TYPE_CHECKING, Any, Callable, List, Dict, Optional, Tuple
+from .cache import ResponseCache, cache_key
+from .client import RateLimiter, acall_with_retry, call_with_retry, estimate_tokens
+from .generation import PROFILES, GenerationProfile
+from .memory import DIALOGUE_CONTEXT_TOKENS, AgentMemory, count_tokens
+from .transcript import Transcript
+
+if TYPE_CHECKING:
+    from anthropic import Anthropic, AsyncAnthropic
+
+MODEL = "claude-3-sonnet-20240229"
+
+# Per-answer limit in structured calls, so every part fits the think_structured token budget
+STRUCTURED_ANSWER_WORDS = 40
+
+_call_ids = itertools.count(1)
 
 class CamelAgent:
     """Base agent with CAMEL-inspired collaborative capabilities"""
-    
-    def __init__(self, name: str, role: str, client: Anthropic):
+
+    def __init__(self, name: str, role: str, client: "Anthropic", async_client: Optional["AsyncAnthropic"] = None,
+                 cache: Optional[ResponseCache] = None):
         self.name = name
         self.role = role
         self.client = client
-        self.memory = []
-        
-    def think(self, context: str) -> str:
-        """Process information and make decisions"""
-        prompt = self._create_prompt(context)
-        response = self.client.messages.create(
-            model="claude-3-sonnet-20240229",
-            max_tokens=1000,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        thought = response.content[0].text
+        self.async_client = async_client
+        # Shared limiter for concurrent calls, set by the simulation before async runs
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        # Response cache for byte-identical requests; None bypasses caching
+        self.cache = cache
+        # Progress event callback (event_type, **fields); set by the simulation
+        self.emit: Optional[Callable] = None
+        # Stream responses and emit token deltas as they arrive
+        self.stream_tokens = False
+        # Process-wide request/token budget shared with other simulations
+        self.rate_limiter: Optional[RateLimiter] = None
+        # Answer multi-part queries with one structured JSON call instead of one call per part
+        self.batched = False
+        # Run transcript: recorded responses are served first and every call is appended to it
+        self.transcript: Optional[Transcript] = None
+        # Token-capped record of past thoughts; older entries are folded into a summary
+        self.memory = AgentMemory()
+        # Generation profile (max_tokens and early stop) per kind of call; replace entries to tune this agent
+        self.profiles: Dict[str, GenerationProfile] = dict(PROFILES)
+
+    def fork(self) -> "CamelAgent":
+        """Copy of this agent for a branched run; memory is shared copy-on-write"""
+        agent = copy.copy(self)
+        agent.memory = self.memory.fork()
+        return agent
+
+    def _request(self, prompt: str, profile: GenerationProfile) -> Dict:
+        """Build the Messages API arguments for a single-turn prompt"""
+        return {
+            "model": MODEL,
+            "max_tokens": profile.max_tokens,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+
+    def _cached(self, key: str) -> Optional[str]:
+        if self.cache is None:
+            return None
+        return self.cache.get(key)
+
+    def _lookup(self, key: str) -> Tuple[Optional[str], bool]:
+        """Recorded or cached response text, and whether it was replayed from the transcript"""
+        if self.transcript is not None:
+            text = self.transcript.lookup(key)
+            if text is not None:
+                return text, True
+        return self._cached(key), False
+
+    async def _alookup(self, key: str) -> Tuple[Optional[str], bool]:
+        """Async _lookup; disk cache reads run off the event loop"""
+        if self.transcript is not None:
+            text = self.transcript.lookup(key)
+            if text is not None:
+                return text, True
+        if self.cache is None:
+            return None, False
+        return await self.cache.aget(key), False
+
+    def _record(self, key: str, request: Dict, text: str):
+        if self.transcript is not None:
+            self.transcript.record_call(key, self.name, request, text)
+
+    def _store(self, key: str, text: str):
+        if self.cache is not None:
+            self.cache.set(key, text)
+
+    async def _astore(self, key: str, text: str):
+        if self.cache is not None:
+            await self.cache.aset(key, text)
+
+    def _emit(self, event_type: str, **fields):
+        if self.emit is not None:
+            self.emit(event_type, **fields)
+
+    def _retry_counter(self, call_id: int, stats: Dict) -> Callable[[Exception, int], None]:
+        def on_retry(error: Exception, attempt: int):
+            stats["retries"] += 1
+            self._emit("call_retry", agent=self.name, call_id=call_id, attempt=attempt + 1,
+                       error=type(error).__name__)
+        return on_retry
+
+    def _delta(self, call_id: int, profile: GenerationProfile, parts: List[str], text: str) -> bool:
+        """Collect a streamed text delta; True once the profile has enough to stop"""
+        parts.append(text)
+        if self.stream_tokens:
+            self._emit("token", agent=self.name, call_id=call_id, text=text)
+        return profile.done("".join(parts))
+
+    def _streams(self, profile: GenerationProfile) -> bool:
+        return self.stream_tokens or profile.stops_early
+
+    def _finish(self, estimated: int, result: Tuple[str, Any, bool], profile: GenerationProfile,
+                stats: Dict) -> Tuple[str, Dict]:
+        """Trim the text to the profile and fill in usage stats; settles the rate limiter's estimate"""
+        text, usage, stopped = result
+        stats["input_tokens"] = usage.input_tokens
+        # A stream closed early never reports its final usage; count what was received instead
+        stats["output_tokens"] = count_tokens(text) if stopped else usage.output_tokens
+        stats["stopped"] = stopped
+        if self.rate_limiter is not None:
+            self.rate_limiter.settle(estimated, stats["input_tokens"] + stats["output_tokens"])
+        return profile.trim(text), stats
+
+    def _create(self, request: Dict, call_id: int, profile: GenerationProfile) -> Tuple[str, Dict]:
+        """Send a request; returns the text and its usage stats (tokens, retries, early stop)"""
+        estimated = estimate_tokens(request)
+        stats = {"input_tokens": 0, "output_tokens": 0, "retries": 0}
+
+        def send():
+            if self._streams(profile):
+                parts = []
+                with self.client.messages.stream(**request) as stream:
+                    for text in stream.text_stream:
+                        if self._delta(call_id, profile, parts, text):
+                            # Leaving the block closes the connection, ending generation
+                            return "".join(parts), stream.current_message_snapshot.usage, True
+                    return "".join(parts), stream.current_message_snapshot.usage, False
+            response = self.client.messages.create(**request)
+            return response.content[0].text, response.usage, False
+
+        def attempt():
+            if self.rate_limiter is None:
+                return send()
+            self.rate_limiter.acquire(estimated)
+            try:
+                return send()
+            except BaseException:
+                # Each retry reserves again, so a failed attempt gives its reservation back
+                self.rate_limiter.settle(estimated, 0)
+                raise
+
+        result = call_with_retry(attempt, on_retry=self._retry_counter(call_id, stats))
+        return self._finish(estimated, result, profile, stats)
+
+    async def _acreate(self, request: Dict, call_id: int, profile: GenerationProfile) -> Tuple[str, Dict]:
+        if self.async_client is None:
+            raise RuntimeError(f"{self.name} has no async client configured")
+        estimated = estimate_tokens(request)
+        stats = {"input_tokens": 0, "output_tokens": 0, "retries": 0}
+
+        async def send():
+            if self._streams(profile):
+                parts = []
+                async with self.async_client.messages.stream(**request) as stream:
+                    async for text in stream.text_stream:
+                        if self._delta(call_id, profile, parts, text):
+                            return "".join(parts), stream.current_message_snapshot.usage, True
+                    return "".join(parts), stream.current_message_snapshot.usage, False
+            response = await self.async_client.messages.create(**request)
+            return response.content[0].text, response.usage, False
+
+        async def attempt():
+            if self.rate_limiter is None:
+                return await send()
+            await self.rate_limiter.aacquire(estimated)
+            try:
+                return await send()
+            except BaseException:
+                self.rate_limiter.settle(estimated, 0)
+                raise
+
+        result = await acall_with_retry(attempt, on_retry=self._retry_counter(call_id, stats))
+        return self._finish(estimated, result, profile, stats)
+
+    def _complete(self, prompt: str, kind: str = "think") -> str:
+        """Send a single-turn prompt and return the response text.
+
+        The generation profile for kind sets max_tokens and when streaming may stop.
+        Transcript responses are used first, then the cache, then the API. call_end events carry
+        the wall time, token usage and retry count; replayed and cached calls report zero tokens.
+        """
+        profile = self.profiles.get(kind, self.profiles["think"])
+        request = self._request(prompt, profile)
+        key = cache_key(request, profile.stop_key)
+        call_id = next(_call_ids)
+        self._emit("call_start", agent=self.name, call_id=call_id, method=kind)
+        start = time.perf_counter()
+        text, replayed = self._lookup(key)
+        cached = text is not None
+        stats = {}
+        if not cached:
+            text, stats = self._create(request, call_id, profile)
+            self._store(key, text)
+        if not replayed:
+            self._record(key, request, text)
+        self._emit("call_end", agent=self.name, call_id=call_id, method=kind, cached=cached,
+                   replayed=replayed, duration=time.perf_counter() - start, **stats)
+        return text
+
+    async def _acomplete(self, prompt: str, kind: str = "think") -> str:
+        """Async variant of _complete, bounded by the shared semaphore"""
+        profile = self.profiles.get(kind, self.profiles["think"])
+        request = self._request(prompt, profile)
+        key = cache_key(request, profile.stop_key)
+        call_id = next(_call_ids)
+        self._emit("call_start", agent=self.name, call_id=call_id, method=kind)
+        start = time.perf_counter()
+        text, replayed = await self._alookup(key)
+        cached = text is not None
+        stats = {}
+        if not cached:
+            if self.semaphore is None:
+                text, stats = await self._acreate(request, call_id, profile)
+            else:
+                async with self.semaphore:
+                    text, stats = await self._acreate(request, call_id, profile)
+            await self._astore(key, text)
+        if not replayed:
+            self._record(key, request, text)
+        self._emit("call_end", agent=self.name, call_id=call_id, method=kind, cached=cached,
+                   replayed=replayed, duration=time.perf_counter() - start, **stats)
+        return text
+
+    def think(self, context: str, kind: str = "think") -> str:
+        """Process information and make decisions; kind picks the generation profile"""
+        thought = self._complete(self._create_prompt(context), kind)
         self.memory.append({"context": context, "thought": thought})
         return thought
-    
-    def dialogue_with(self, other_agent, topic: str, turns: int = 3) -> List[Dict]:
-        """Have a back-and-forth dialogue with another agent"""
-        conversation = []
-        
-        # Start the conversation
-        first_prompt = f"""
+
+    async def athink(self, context: str, kind: str = "think") -> str:
+        """Async variant of think that can run alongside other calls"""
+        thought = await self._acomplete(self._create_prompt(context), kind)
+        self.memory.append({"context": context, "thought": thought})
+        return thought
+
+    def _structured_prompt(self, context: str, schema: str) -> str:
+        return self._create_prompt(context) + f"""
+
+        Answer every part of the task in a single JSON object and nothing else, matching this schema:
+        {schema}
+        Instead of the word limit above, keep each answer under {STRUCTURED_ANSWER_WORDS} words."""
+
+    def think_structured(self, context: str, schema: str,
+                         validate: Callable[[Any], Optional[Dict]]) -> Optional[Dict]:
+        """Answer a multi-part task in one call; None if the JSON response fails validation"""
+        thought = self._complete(self._structured_prompt(context, schema), "think_structured")
+        self.memory.append({"context": context, "thought": thought})
+        return self._validated(thought, validate)
+
+    async def athink_structured(self, context: str, schema: str,
+                                validate: Callable[[Any], Optional[Dict]]) -> Optional[Dict]:
+        """Async variant of think_structured"""
+        thought = await self._acomplete(self._structured_prompt(context, schema), "think_structured")
+        self.memory.append({"context": context, "thought": thought})
+        return self._validated(thought, validate)
+
+    def _validated(self, thought: str, validate: Callable[[Any], Optional[Dict]]) -> Optional[Dict]:
+        result = validate(parse_json_object(thought))
+        if result is None:
+            self._emit("log", message=f"  ({self.name}: structured response invalid, falling back to per-item calls)")
+        return result
+
+    def _opening_prompt(self, other_agent, topic: str) -> str:
+        return f"""
         You are {self.name}, the {self.role}.
         You're starting a conversation with {other_agent.name}, the {other_agent.role}, about {topic}.
         Provide your initial thoughts or questions about {topic}.
         Keep your response under 100 words and be professional.
         """
-        
-        response = self.client.messages.create(
-            model="claude-3-sonnet-20240229",
-            max_tokens=1000,
-            messages=[{"role": "user", "content": first_prompt}]
-        )
-        
-        first_message = response.content[0].text
-        conversation.append({"speaker": self.name, "message": first_message})
-        print(f"  {self.name}: {first_message[:100]}...")
-        
-        # Continue the dialogue for specified turns
-        current_speaker = other_agent
-        other_speaker = self
-        context = first_message
-        
-        for _ in range(turns):
-            next_prompt = f"""
+
+    def _reply_prompt(self, current_speaker, other_speaker, topic: str, context: str, history: str = "") -> str:
+        if history:
+            history = f"\n            The conversation so far:\n{history}\n"
+        return f"""
             You are {current_speaker.name}, the {current_speaker.role}.
             You're in a conversation with {other_speaker.name}, the {other_speaker.role}, about {topic}.
-            
+            {history}
             This is what {other_speaker.name} just said:
             "{context}"
-            
+
             Respond to their points, advancing the discussion about {topic}.
             Keep your response under 100 words and be professional.
             """
-            
-            response = self.client.messages.create(
-                model="claude-3-sonnet-20240229",
-                max_tokens=1000,
-                messages=[{"role": "user", "content": next_prompt}]
-            )
-            
-            next_message = response.content[0].text
+
+    def dialogue_with(self, other_agent, topic: str, turns: int = 3,
+                      context_tokens: int = DIALOGUE_CONTEXT_TOKENS) -> List[Dict]:
+        """Have a back-and-forth dialogue with another agent.
+
+        Each reply sees the previous message plus as much earlier conversation as
+        fits in context_tokens, so prompt size stays flat as turns grow.
+        """
+        conversation = []
+        transcript = AgentMemory(max_tokens=context_tokens)
+
+        # Start the conversation
+        first_message = self._complete(self._opening_prompt(other_agent, topic), "dialogue")
+        conversation.append({"speaker": self.name, "message": first_message})
+        transcript.append(conversation[-1])
+        self._emit("dialogue_turn", speaker=self.name, message=first_message)
+
+        # Continue the dialogue for specified turns
+        current_speaker = other_agent
+        other_speaker = self
+        context = first_message
+
+        for _ in range(turns):
+            history = transcript.context(context_tokens, skip_last=1)
+            next_prompt = self._reply_prompt(current_speaker, other_speaker, topic, context, history)
+            next_message = self._complete(next_prompt, "dialogue")
             conversation.append({"speaker": current_speaker.name, "message": next_message})
-            print(f"  {current_speaker.name}: {next_message[:100]}...")
-            
+            transcript.append(conversation[-1])
+            self._emit("dialogue_turn", speaker=current_speaker.name, message=next_message)
+
             # Switch speakers
             current_speaker, other_speaker = other_speaker, current_speaker
             context = next_message
-        
+
         return conversation
-    
+
+    async def adialogue_with(self, other_agent, topic: str, turns: int = 3,
+                             context_tokens: int = DIALOGUE_CONTEXT_TOKENS) -> List[Dict]:
+        """Async variant of dialogue_with; turns remain sequential since each depends on the last"""
+        conversation = []
+        transcript = AgentMemory(max_tokens=context_tokens)
+
+        first_message = await self._acomplete(self._opening_prompt(other_agent, topic), "dialogue")
+        conversation.append({"speaker": self.name, "message": first_message})
+        transcript.append(conversation[-1])
+        self._emit("dialogue_turn", speaker=self.name, message=first_message)
+
+        current_speaker = other_agent
+        other_speaker = self
+        context = first_message
+
+        for _ in range(turns):
+            history = transcript.context(context_tokens, skip_last=1)
+            next_prompt = self._reply_prompt(current_speaker, other_speaker, topic, context, history)
+            next_message = await self._acomplete(next_prompt, "dialogue")
+            conversation.append({"speaker": current_speaker.name, "message": next_message})
+            transcript.append(conversation[-1])
+            self._emit("dialogue_turn", speaker=current_speaker.name, message=next_message)
+
+            current_speaker, other_speaker = other_speaker, current_speaker
+            context = next_message
+
+        return conversation
+
     def _create_prompt(self, context: str) -> str:
         """Create role-specific prompts"""
-        raise NotImplementedError("Subclasses must implement this method")
\ No newline at end of file
+        raise NotImplementedError("Subclasses must implement this method")
+
+
+def parse_json_object(text: str) -> Optional[Dict]:
+    """Extract the outermost JSON object from a response, tolerating code fences or surrounding prose"""
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end <= start:
+        return None
+    try:
+        value = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+    return value if isinstance(value, dict) else None
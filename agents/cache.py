@@ -0,0 +1,240 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+DEFAULT_CACHE_DIR = os.getenv("SIM_CACHE_DIR", ".cache")
+DEFAULT_TTL = 7 * 24 * 3600
+# Hits whose access times are held in memory before a read-only workload writes them out
+TOUCH_FLUSH_SIZE = 1000
+
+
+def cache_key(request: Dict, stop: Optional[str] = None) -> str:
+    """Content-address a Messages API request by its model, messages and max_tokens, plus any early-stop rule"""
+    payload = {
+        "model": request["model"],
+        "messages": request["messages"],
+        "max_tokens": request["max_tokens"]
+    }
+    if stop is not None:
+        payload["stop"] = stop
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Interface for LLM response caches; subclasses implement _get and _set"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._get(key)
+            self._count(value)
+            return value
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._set(key, value)
+
+    async def aget(self, key: str) -> Optional[str]:
+        """get() for async callers; runs in a worker thread so disk reads don't block the event loop"""
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: str):
+        await asyncio.to_thread(self.set, key, value)
+
+    def _count(self, value: Optional[str]):
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+    def _get(self, key: str) -> Optional[str]:
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def _set(self, key: str, value: str):
+        raise NotImplementedError("Subclasses must implement this method")
+
+
+class MemoryCache(ResponseCache):
+    """In-process LRU cache with optional TTL"""
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = DEFAULT_TTL):
+        super().__init__()
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+
+    def _get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, created_at = entry
+        if self.ttl is not None and time.time() - created_at > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _set(self, key: str, value: str):
+        self._entries[key] = (value, time.time())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def aget(self, key: str) -> Optional[str]:
+        return self.get(key)
+
+    async def aset(self, key: str, value: str):
+        self.set(key, value)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCache(ResponseCache):
+    """On-disk cache that survives restarts; evicts expired and least recently used rows"""
+
+    def __init__(self, path: str, max_entries: int = 100_000, ttl: Optional[float] = DEFAULT_TTL):
+        super().__init__()
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        self._conn.commit()
+        self._writes = 0
+        # Access times of recent hits, written out with the next insert instead of one commit per hit.
+        # They only order LRU eviction, so losing them on exit costs nothing else.
+        self._touched: Dict[str, float] = {}
+
+    def _get(self, key: str) -> Optional[str]:
+        row = self._conn.execute(
+            "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, created_at = row
+        now = time.time()
+        if self.ttl is not None and now - created_at > self.ttl:
+            self._touched.pop(key, None)
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._conn.commit()
+            return None
+        self._touched[key] = now
+        if len(self._touched) >= TOUCH_FLUSH_SIZE:
+            self._flush_touched()
+            self._conn.commit()
+        return value
+
+    def _flush_touched(self):
+        if self._touched:
+            self._conn.executemany("UPDATE responses SET accessed_at = ? WHERE key = ?",
+                                   [(accessed_at, key) for key, accessed_at in self._touched.items()])
+            self._touched.clear()
+
+    def _set(self, key: str, value: str):
+        now = time.time()
+        self._touched.pop(key, None)
+        self._flush_touched()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO responses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, value, now, now)
+        )
+        self._writes += 1
+        # Evicting on every write would turn each insert into a table scan
+        if self._writes % 100 == 0:
+            self._evict()
+        self._conn.commit()
+
+    def _evict(self):
+        if self.ttl is not None:
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl,))
+        self._conn.execute("""
+            DELETE FROM responses WHERE key IN (
+                SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_entries,))
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+class TieredCache(ResponseCache):
+    """Memory LRU in front of a persistent cache; disk hits are promoted to memory"""
+
+    def __init__(self, memory: MemoryCache, disk: ResponseCache):
+        super().__init__()
+        self.memory = memory
+        self.disk = disk
+
+    def _get(self, key: str) -> Optional[str]:
+        value = self.memory.get(key)
+        if value is None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+        return value
+
+    def _set(self, key: str, value: str):
+        self.memory.set(key, value)
+        self.disk.set(key, value)
+
+    async def aget(self, key: str) -> Optional[str]:
+        """Memory hits are served inline; only the disk tier goes to a worker thread"""
+        value = self.memory.get(key)
+        if value is None:
+            value = await self.disk.aget(key)
+            if value is not None:
+                self.memory.set(key, value)
+        with self._lock:
+            self._count(value)
+        return value
+
+    async def aset(self, key: str, value: str):
+        self.memory.set(key, value)
+        await self.disk.aset(key, value)
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> ResponseCache:
+    """Process-wide response cache shared by every simulation"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = TieredCache(
+                MemoryCache(),
+                SQLiteCache(os.path.join(DEFAULT_CACHE_DIR, "responses.sqlite3"))
+            )
+        return _default_cache
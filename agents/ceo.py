@@ -2,18 +2,27 @@ from .CamelAgent import CamelAgent
 from typing import List, Dict
 
 class CEOAgent(CamelAgent):
-    def __init__(self, client):
-        super().__init__("CEO", "Chief Executive Officer", client)
+    def __init__(self, client, async_client=None, cache=None):
+        super().__init__("CEO", "Chief Executive Officer", client, async_client, cache)
         self.developer = None
         self.marketer = None
         
     def make_strategic_decision(self, issue: str, options: List[str]) -> str:
-        """Make high-level strategic decisions"""
-        return self.think(f"Strategic decision needed on {issue}. Options: {options}")
+        """Make high-level strategic decisions; the reply opens with a "Decision: <option>" line"""
+        return self.think(self._decision_task(issue, options), "decision")
+
+    async def amake_strategic_decision(self, issue: str, options: List[str]) -> str:
+        """Async variant of make_strategic_decision"""
+        return await self.athink(self._decision_task(issue, options), "decision")
+
+    def _decision_task(self, issue: str, options: List[str]) -> str:
+        return (f"Strategic decision needed on {issue}. Options: {options}. "
+                "Start your response with a line reading \"Decision: \" followed by exactly one option, "
+                "word for word, then give your reasoning.")
         
     def resolve_conflict(self, issue: str, participants: List[str]) -> str:
         """Resolve conflicts between team members"""
-        return self.think(f"Based on debate among {participants} about {issue}, resolve this conflict")
+        return self.think(f"Based on debate among {participants} about {issue}, resolve this conflict", "decision")
         
     def _create_prompt(self, context: str) -> str:
         """Create strategic decision-making prompts"""
@@ -31,9 +40,21 @@ class CEOAgent(CamelAgent):
         if not self.developer:
             return [{"speaker": "System", "message": "Developer reference not set"}]
         return self.dialogue_with(self.developer, f"technical approach for {topic}")
+
+    async def abrainstorm_with_developer(self, topic: str) -> List[Dict]:
+        """Async variant of brainstorm_with_developer"""
+        if not self.developer:
+            return [{"speaker": "System", "message": "Developer reference not set"}]
+        return await self.adialogue_with(self.developer, f"technical approach for {topic}")
     
     def plan_with_marketer(self, topic: str) -> List[Dict]:
         """Plan marketing strategy with the marketer"""
         if not self.marketer:
             return [{"speaker": "System", "message": "Marketer reference not set"}]
-        return self.dialogue_with(self.marketer, f"marketing strategy for {topic}")
\ No newline at end of file
+        return self.dialogue_with(self.marketer, f"marketing strategy for {topic}")
+
+    async def aplan_with_marketer(self, topic: str) -> List[Dict]:
+        """Async variant of plan_with_marketer"""
+        if not self.marketer:
+            return [{"speaker": "System", "message": "Marketer reference not set"}]
+        return await self.adialogue_with(self.marketer, f"marketing strategy for {topic}")
\ No newline at end of file
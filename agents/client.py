@@ -0,0 +1,227 @@
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional, TypeVar
+
+# anthropic and httpx dominate start-up time, so they are imported when first needed
+if TYPE_CHECKING:
+    import httpx
+    from anthropic import Anthropic, AsyncAnthropic
+
+T = TypeVar("T")
+RetryCallback = Callable[[Exception, int], None]
+
+MAX_CONNECTIONS = int(os.getenv("SIM_MAX_CONNECTIONS", "20"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("SIM_MAX_KEEPALIVE_CONNECTIONS", "10"))
+REQUESTS_PER_MINUTE = float(os.getenv("SIM_REQUESTS_PER_MINUTE", "50"))
+TOKENS_PER_MINUTE = float(os.getenv("SIM_TOKENS_PER_MINUTE", "40000"))
+MAX_RETRIES = int(os.getenv("SIM_MAX_RETRIES", "5"))
+
+# Rough characters-per-token ratio used to size a request before it is sent
+CHARS_PER_TOKEN = 4
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at capacity per minute.
+
+    reserve() never blocks: it takes the tokens immediately (the balance may go
+    negative) and returns how long the caller must wait before proceeding, so
+    sync and async callers can share the same bucket.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.tokens = per_minute
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def reserve(self, amount: float) -> float:
+        with self._lock:
+            self._refill()
+            # A single request larger than the bucket would otherwise wait forever
+            self.tokens -= min(amount, self.capacity)
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def refund(self, amount: float):
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits shared by every simulation in the process"""
+
+    def __init__(self, requests_per_minute: float = REQUESTS_PER_MINUTE,
+                 tokens_per_minute: float = TOKENS_PER_MINUTE):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+    def _reserve(self, estimated_tokens: int) -> float:
+        return max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+
+    def acquire(self, estimated_tokens: int):
+        wait = self._reserve(estimated_tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, estimated_tokens: int):
+        wait = self._reserve(estimated_tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def settle(self, estimated_tokens: int, actual_tokens: int):
+        """Return the unused part of a reservation once the real usage is known"""
+        if actual_tokens < estimated_tokens:
+            self.tokens.refund(estimated_tokens - actual_tokens)
+
+
+def estimate_tokens(request: dict) -> int:
+    """Upper-bound token cost of a request: prompt size plus the completion budget"""
+    chars = sum(len(message["content"]) for message in request["messages"])
+    return chars // CHARS_PER_TOKEN + request["max_tokens"]
+
+
+def _is_retryable(error: Exception) -> bool:
+    from anthropic import APIConnectionError, APIStatusError
+    if isinstance(error, APIConnectionError):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def _backoff(error: Exception, attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """Full-jitter exponential backoff, honouring the server's retry-after hint when present"""
+    from anthropic import APIStatusError
+    if isinstance(error, APIStatusError):
+        retry_after = error.response.headers.get("retry-after")
+        try:
+            if retry_after is not None:
+                return float(retry_after) + random.uniform(0, base)
+        except ValueError:
+            pass
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def call_with_retry(fn: Callable[[], T], max_retries: int = MAX_RETRIES,
+                    on_retry: Optional[RetryCallback] = None) -> T:
+    """Call fn, retrying transient errors; on_retry(error, attempt) runs before each backoff"""
+    for attempt in range(max_retries + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == max_retries or not _is_retryable(e):
+                raise
+            if on_retry is not None:
+                on_retry(e, attempt)
+            time.sleep(_backoff(e, attempt))
+
+
+async def acall_with_retry(fn: Callable[[], Awaitable[T]], max_retries: int = MAX_RETRIES,
+                           on_retry: Optional[RetryCallback] = None) -> T:
+    for attempt in range(max_retries + 1):
+        try:
+            return await fn()
+        except Exception as e:
+            if attempt == max_retries or not _is_retryable(e):
+                raise
+            if on_retry is not None:
+                on_retry(e, attempt)
+            await asyncio.sleep(_backoff(e, attempt))
+
+
+def _limits() -> "httpx.Limits":
+    import httpx
+    return httpx.Limits(max_connections=MAX_CONNECTIONS,
+                        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS)
+
+
+_lock = threading.Lock()
+_client: Optional["Anthropic"] = None
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncAnthropic]" = weakref.WeakKeyDictionary()
+_rate_limiter: Optional[RateLimiter] = None
+# Replacement httpx transports, e.g. the offline fake API in bench/; None uses the network
+_transport: Optional["httpx.BaseTransport"] = None
+_async_transport: Optional["httpx.AsyncBaseTransport"] = None
+
+
+def use_transport(transport: Optional["httpx.BaseTransport"],
+                  async_transport: Optional["httpx.AsyncBaseTransport"]):
+    """Route all API traffic through the given transports (None restores the network).
+
+    Pooled clients are discarded so the next get_client()/get_async_client() picks them up.
+    """
+    global _client, _transport, _async_transport
+    with _lock:
+        _transport, _async_transport = transport, async_transport
+        _client = None
+        _async_clients.clear()
+
+
+def get_client() -> "Anthropic":
+    """Process-wide pooled client; retries are handled by call_with_retry"""
+    from anthropic import Anthropic, DefaultHttpxClient
+    global _client
+    with _lock:
+        if _client is None:
+            _client = Anthropic(
+                api_key=os.getenv("ANTHROPIC_API_KEY"),
+                http_client=DefaultHttpxClient(limits=_limits(), transport=_transport),
+                max_retries=0
+            )
+        return _client
+
+
+def get_async_client() -> "AsyncAnthropic":
+    """Pooled async client for the running event loop.
+
+    httpx async connection pools are bound to the loop that created them, so
+    one client is kept per loop; work scheduled on run_in_background_loop()
+    shares a single pool.
+    """
+    from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            client = AsyncAnthropic(
+                api_key=os.getenv("ANTHROPIC_API_KEY"),
+                http_client=DefaultAsyncHttpxClient(limits=_limits(), transport=_async_transport),
+                max_retries=0
+            )
+            _async_clients[loop] = client
+        return client
+
+
+def get_rate_limiter() -> RateLimiter:
+    global _rate_limiter
+    with _lock:
+        if _rate_limiter is None:
+            _rate_limiter = RateLimiter()
+        return _rate_limiter
+
+
+_background_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def run_in_background_loop(coro: Awaitable[T]) -> T:
+    """Run a coroutine on a long-lived shared event loop and block until it finishes.
+
+    Worker threads use this instead of asyncio.run() so every simulation reuses
+    the same async connection pool.
+    """
+    global _background_loop
+    with _lock:
+        if _background_loop is None:
+            _background_loop = asyncio.new_event_loop()
+            threading.Thread(target=_background_loop.run_forever, name="sim-loop", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop).result()
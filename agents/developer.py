@@ -1,20 +1,58 @@
+import asyncio
 from .CamelAgent import CamelAgent
-from typing import Dict
+from typing import Any, Dict, List, Optional
+
+EFFORT_SCHEMA = '{"estimates": [{"feature": "<feature>", "time": "<time estimate>", "complexity": "<complexity assessment>"}]} with one entry per feature, in the order given'
 
 class DeveloperAgent(CamelAgent):
-    def __init__(self, client):
-        super().__init__("Developer", "Technical Lead", client)
+    def __init__(self, client, async_client=None, cache=None):
+        super().__init__("Developer", "Technical Lead", client, async_client, cache)
         
     def evaluate_tech_stack(self, requirements: Dict) -> str:
         """Evaluate and recommend technical solutions"""
         return self.think(f"Evaluate tech stack for requirements: {requirements}")
+
+    async def aevaluate_tech_stack(self, requirements: Dict) -> str:
+        """Async variant of evaluate_tech_stack"""
+        return await self.athink(f"Evaluate tech stack for requirements: {requirements}")
         
-    def estimate_effort(self, feature: str) -> Dict:
-        """Estimate development effort and technical complexity"""
+    def estimate_effort(self, feature: str, approach: Optional[str] = None) -> Dict:
+        """Estimate development effort and technical complexity, given the development approach if one is set"""
         return {
-            "time": self.think(f"Estimate time for {feature}"),
-            "complexity": self.think(f"Evaluate complexity of {feature}")
+            "time": self.think(f"Estimate time for {feature}{_approach_note(approach)}", "estimate"),
+            "complexity": self.think(f"Evaluate complexity of {feature}{_approach_note(approach)}", "estimate")
         }
+
+    async def aestimate_effort(self, feature: str, approach: Optional[str] = None) -> Dict:
+        """Async variant of estimate_effort; time and complexity are requested concurrently"""
+        time, complexity = await asyncio.gather(
+            self.athink(f"Estimate time for {feature}{_approach_note(approach)}", "estimate"),
+            self.athink(f"Evaluate complexity of {feature}{_approach_note(approach)}", "estimate")
+        )
+        return {"time": time, "complexity": complexity}
+
+    def estimate_efforts(self, features: List[str], approach: Optional[str] = None) -> Dict[str, Dict]:
+        """Estimate several features; one structured call when batched, else estimate_effort per feature"""
+        if self.batched:
+            efforts = self.think_structured(self._efforts_task(features, approach), EFFORT_SCHEMA,
+                                            lambda data: _parse_efforts(features, data))
+            if efforts is not None:
+                return efforts
+        return {feature: self.estimate_effort(feature, approach) for feature in features}
+
+    async def aestimate_efforts(self, features: List[str], approach: Optional[str] = None) -> Dict[str, Dict]:
+        """Async variant of estimate_efforts; unbatched features are estimated concurrently"""
+        if self.batched:
+            efforts = await self.athink_structured(self._efforts_task(features, approach), EFFORT_SCHEMA,
+                                                   lambda data: _parse_efforts(features, data))
+            if efforts is not None:
+                return efforts
+        efforts = await asyncio.gather(*(self.aestimate_effort(feature, approach) for feature in features))
+        return dict(zip(features, efforts))
+
+    def _efforts_task(self, features: List[str], approach: Optional[str] = None) -> str:
+        listed = "\n".join(f"{i}. {feature}" for i, feature in enumerate(features, 1))
+        return f"Estimate time and evaluate complexity for each of these features{_approach_note(approach)}:\n{listed}"
         
     def _create_prompt(self, context: str) -> str:
         """Create development-focused prompts"""
@@ -25,4 +63,23 @@ class DeveloperAgent(CamelAgent):
 
         Provide a technical assessment focusing on modern best practices, scalability, and efficiency.
         Consider trade-offs between development speed, technical debt, and scalability.
-        Keep your response under 200 words and be specific about technologies where appropriate."""
\ No newline at end of file
+        Keep your response under 200 words and be specific about technologies where appropriate."""
+
+
+def _approach_note(approach: Optional[str]) -> str:
+    return f" (development approach: {approach})" if approach else ""
+
+
+def _parse_efforts(features: List[str], data: Any) -> Optional[Dict[str, Dict]]:
+    """Map a structured response back to {feature: {"time", "complexity"}}, or None if malformed"""
+    estimates = data.get("estimates") if isinstance(data, dict) else None
+    if not isinstance(estimates, list) or len(estimates) != len(features):
+        return None
+    efforts = {}
+    for feature, item in zip(features, estimates):
+        if not isinstance(item, dict):
+            return None
+        if not all(isinstance(item.get(key), str) and item[key].strip() for key in ("time", "complexity")):
+            return None
+        efforts[feature] = {"time": item["time"], "complexity": item["complexity"]}
+    return efforts
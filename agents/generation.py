@@ -0,0 +1,120 @@
+import json
+import os
+import re
+from typing import Dict, Optional
+
+_WORD = re.compile(r"\S+")
+_SENTENCE_END = re.compile(r"[.!?](?=\s|$)")
+
+
+class GenerationProfile:
+    """Output budget for one kind of call: a max_tokens cap plus an optional early stop.
+
+    Profiles that can stop early are streamed. max_words ends the stream once the
+    response runs past that many words and trims it to the last whole sentence
+    within them. json_object ends it as soon as a complete top-level JSON object has
+    arrived. Trimming depends only on the text, so a streamed response and a full
+    one end the same way.
+    """
+
+    def __init__(self, max_tokens: int, max_words: Optional[int] = None, json_object: bool = False):
+        self.max_tokens = max_tokens
+        self.max_words = max_words
+        self.json_object = json_object
+
+    @property
+    def stops_early(self) -> bool:
+        return self.json_object or bool(self.max_words)
+
+    @property
+    def stop_key(self) -> Optional[str]:
+        """Stop rule as part of the cache key; responses cut by different rules aren't interchangeable"""
+        if self.json_object:
+            return "json"
+        if self.max_words:
+            return f"words:{self.max_words}"
+        return None
+
+    def done(self, text: str) -> bool:
+        """True once enough of the response has arrived to stop streaming"""
+        if self.json_object:
+            return json_end(text) is not None
+        if self.max_words:
+            # One word past the limit, so the last word inside it is known to be complete
+            return len(text.split()) > self.max_words
+        return False
+
+    def trim(self, text: str) -> str:
+        if self.json_object:
+            end = json_end(text)
+            return text if end is None else text[:end]
+        if not self.max_words:
+            return text
+        words = list(_WORD.finditer(text))
+        if len(words) <= self.max_words:
+            return text
+        cut = text[:words[self.max_words - 1].end()]
+        # Prefer ending on a whole sentence unless that drops more than half the allowance
+        sentences = list(_SENTENCE_END.finditer(cut))
+        if sentences:
+            sentence = cut[:sentences[-1].end()]
+            if len(sentence.split()) >= self.max_words // 2:
+                return sentence
+        return cut
+
+    def to_dict(self) -> Dict:
+        return {"max_tokens": self.max_tokens, "max_words": self.max_words, "json_object": self.json_object}
+
+
+def json_end(text: str) -> Optional[int]:
+    """Index just past the first complete top-level JSON object in text, or None if it is still open"""
+    start = text.find("{")
+    if start < 0:
+        return None
+    depth = 0
+    in_string = escaped = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return None
+
+
+# Word limits match what each prompt asks for; max_tokens leaves headroom over them
+DEFAULT_PROFILES = {
+    "think": GenerationProfile(max_tokens=400, max_words=200),
+    "decision": GenerationProfile(max_tokens=400, max_words=200),
+    "estimate": GenerationProfile(max_tokens=400, max_words=200),
+    "dialogue": GenerationProfile(max_tokens=200, max_words=100),
+    "think_structured": GenerationProfile(max_tokens=2000, json_object=True),
+}
+
+
+def load_profiles(overrides: Optional[str] = None) -> Dict[str, GenerationProfile]:
+    """Default profiles updated from JSON such as '{"dialogue": {"max_tokens": 150, "max_words": 80}}'.
+
+    overrides defaults to the SIM_GENERATION_PROFILES environment variable.
+    """
+    if overrides is None:
+        overrides = os.getenv("SIM_GENERATION_PROFILES", "")
+    profiles = dict(DEFAULT_PROFILES)
+    for kind, fields in (json.loads(overrides) if overrides else {}).items():
+        base = profiles.get(kind, profiles["think"]).to_dict()
+        profiles[kind] = GenerationProfile(**{**base, **fields})
+    return profiles
+
+
+PROFILES = load_profiles()
@@ -0,0 +1,28 @@
+import json
+import os
+from typing import Dict, Iterator, TextIO
+
+
+def read_records(path: str) -> Iterator[Dict]:
+    """JSON objects of an append-only JSONL file, skipping lines that don't parse.
+
+    A process killed mid-write leaves a truncated last line; it is dropped
+    rather than failing the whole read.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def open_append(path: str) -> TextIO:
+    """Open a JSONL file for appending, first terminating a line left truncated by an interrupted writer"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    f = open(path, "a+", encoding="utf-8")
+    if f.tell() > 0:
+        f.seek(f.tell() - 1)
+        if f.read(1) != "\n":
+            f.write("\n")
+    return f
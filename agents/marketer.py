@@ -1,18 +1,46 @@
+import asyncio
 from .CamelAgent import CamelAgent
-from typing import Dict
+from typing import Any, Dict, Optional
+
+MARKET_FACETS = ("market_size", "competitors", "positioning")
+MARKET_SCHEMA = '{"market_size": "<market size estimate>", "competitors": "<main competitors>", "positioning": "<suggested positioning>"}'
 
 class MarketerAgent(CamelAgent):
-    def __init__(self, client):
-        super().__init__("Marketer", "Marketing Lead", client)
+    def __init__(self, client, async_client=None, cache=None):
+        super().__init__("Marketer", "Marketing Lead", client, async_client, cache)
         
     def analyze_market(self, product: str) -> Dict:
         """Analyze market potential and competition"""
+        if self.batched:
+            analysis = self.think_structured(self._market_task(product), MARKET_SCHEMA, _parse_market)
+            if analysis is not None:
+                return analysis
         return {
             "market_size": self.think(f"Estimate market size for {product}"),
             "competitors": self.think(f"Identify main competitors for {product}"),
             "positioning": self.think(f"Suggest positioning for {product}")
         }
+
+    async def aanalyze_market(self, product: str) -> Dict:
+        """Async variant of analyze_market; unbatched, the three facets are requested concurrently"""
+        if self.batched:
+            analysis = await self.athink_structured(self._market_task(product), MARKET_SCHEMA, _parse_market)
+            if analysis is not None:
+                return analysis
+        market_size, competitors, positioning = await asyncio.gather(
+            self.athink(f"Estimate market size for {product}"),
+            self.athink(f"Identify main competitors for {product}"),
+            self.athink(f"Suggest positioning for {product}")
+        )
+        return {
+            "market_size": market_size,
+            "competitors": competitors,
+            "positioning": positioning
+        }
         
+    def _market_task(self, product: str) -> str:
+        return f"Estimate market size, identify main competitors and suggest positioning for {product}"
+
     def _create_prompt(self, context: str) -> str:
         """Create marketing-focused prompts"""
         return f"""You are a marketing expert with experience in SaaS and tech products.
@@ -22,4 +50,13 @@ class MarketerAgent(CamelAgent):
 
         Provide a concise, data-driven response with market insights and strategic recommendations.
         Focus on target audience, market trends, and competitive positioning.
-        Keep your response under 200 words."""
\ No newline at end of file
+        Keep your response under 200 words."""
+
+
+def _parse_market(data: Any) -> Optional[Dict]:
+    """Keep the three market facets of a structured response, or None if any is missing"""
+    if not isinstance(data, dict):
+        return None
+    if not all(isinstance(data.get(facet), str) and data[facet].strip() for facet in MARKET_FACETS):
+        return None
+    return {facet: data[facet] for facet in MARKET_FACETS}
@@ -0,0 +1,146 @@
+import os
+import re
+from collections import deque
+from typing import Dict, Iterator, List
+
+from .client import CHARS_PER_TOKEN
+
+# Token budgets; counts use the same characters-per-token estimate as the rate limiter
+MEMORY_MAX_TOKENS = int(os.getenv("SIM_MEMORY_TOKENS", "4000"))
+SUMMARY_MAX_TOKENS = int(os.getenv("SIM_MEMORY_SUMMARY_TOKENS", "500"))
+DIALOGUE_CONTEXT_TOKENS = int(os.getenv("SIM_DIALOGUE_CONTEXT_TOKENS", "600"))
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def count_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def entry_text(entry: Dict) -> str:
+    """Render a think() record or a dialogue turn as a line of context"""
+    if "speaker" in entry:
+        return f"{entry['speaker']}: {entry['message'].strip()}"
+    return f"Task: {entry['context'].strip()}\nResponse: {entry['thought'].strip()}"
+
+
+def _gist(entry: Dict) -> str:
+    """First sentence of an entry, used when it is folded into the summary"""
+    text = " ".join(entry_text(entry).split())
+    return _SENTENCE_END.split(text, 1)[0]
+
+
+class AgentMemory:
+    """Recent entries in a ring buffer capped by token count.
+
+    Entries evicted from the buffer are folded into a rolling summary (their
+    first sentence each, itself capped at summary_tokens), so memory stays
+    bounded however long an agent lives. The summary is extractive rather than
+    LLM-written so it costs no calls and prompts built from it stay cacheable.
+    """
+
+    def __init__(self, max_tokens: int = MEMORY_MAX_TOKENS, summary_tokens: int = SUMMARY_MAX_TOKENS):
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self._entries: deque = deque()
+        self._tokens = 0
+        self._summary: deque = deque()
+        self._summary_tokens = 0
+        # Set once the buffers are shared with a fork; the next write copies them first
+        self._shared = False
+
+    def fork(self) -> "AgentMemory":
+        """Copy-on-write clone: both memories share the buffers until either one is written"""
+        memory = AgentMemory.__new__(AgentMemory)
+        memory.__dict__.update(self.__dict__)
+        memory._shared = self._shared = True
+        return memory
+
+    def _own(self):
+        if self._shared:
+            self._entries = deque(self._entries)
+            self._summary = deque(self._summary)
+            self._shared = False
+
+    def append(self, entry: Dict):
+        self._own()
+        tokens = count_tokens(entry_text(entry))
+        self._entries.append((entry, tokens))
+        self._tokens += tokens
+        # Always keep the newest entry, even if it alone exceeds the budget
+        while self._tokens > self.max_tokens and len(self._entries) > 1:
+            evicted, evicted_tokens = self._entries.popleft()
+            self._tokens -= evicted_tokens
+            self._summarize(evicted)
+
+    def _summarize(self, entry: Dict):
+        gist = _gist(entry)
+        tokens = count_tokens(gist)
+        self._summary.append((gist, tokens))
+        self._summary_tokens += tokens
+        while self._summary_tokens > self.summary_tokens and len(self._summary) > 1:
+            _, dropped = self._summary.popleft()
+            self._summary_tokens -= dropped
+
+    @property
+    def summary(self) -> str:
+        return "\n".join(gist for gist, _ in self._summary)
+
+    @property
+    def tokens(self) -> int:
+        """Estimated tokens held: buffered entries plus the summary"""
+        return self._tokens + self._summary_tokens
+
+    def context(self, budget: int, skip_last: int = 0) -> str:
+        """Summary plus as many of the newest entries as fit in budget tokens, oldest first.
+
+        skip_last leaves out the newest entries, e.g. a message the prompt quotes separately.
+        """
+        entries = list(self._entries)
+        if skip_last:
+            entries = entries[:-skip_last]
+        # When not everything fits, a quarter of the budget is kept for the summary of older points
+        overflowing = bool(self._summary) or sum(tokens for _, tokens in entries) > budget
+        remaining = budget - budget // 4 if overflowing else budget
+        recent: List[str] = []
+        for entry, tokens in reversed(entries):
+            if tokens > remaining:
+                break
+            recent.append(entry_text(entry))
+            remaining -= tokens
+        parts = []
+        if overflowing:
+            omitted = entries[:len(entries) - len(recent)]
+            gists = [gist for gist, _ in self._summary] + [_gist(entry) for entry, _ in omitted]
+            summary = _fit_newest(gists, remaining + budget // 4)
+            if summary:
+                parts.append("Summary of earlier points:\n" + summary)
+        parts.extend(reversed(recent))
+        return "\n".join(parts)
+
+    def clear(self):
+        self._own()
+        self._entries.clear()
+        self._summary.clear()
+        self._tokens = self._summary_tokens = 0
+
+    def __iter__(self) -> Iterator[Dict]:
+        return (entry for entry, _ in self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getitem__(self, index: int) -> Dict:
+        return self._entries[index][0]
+
+
+def _fit_newest(lines: List[str], budget: int) -> str:
+    """Join the newest lines that fit in budget tokens, oldest first"""
+    kept = []
+    for line in reversed(lines):
+        tokens = count_tokens(line)
+        if tokens > budget:
+            break
+        kept.append(line)
+        budget -= tokens
+    return "\n".join(reversed(kept))
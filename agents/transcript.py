@@ -0,0 +1,79 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Dict, List, Optional
+from .jsonl import open_append, read_records
+
+
+class ReplayMismatch(Exception):
+    """Raised in strict replay when a request has no recorded response"""
+
+
+class Transcript:
+    """Append-only JSONL record of a run: a header, every LLM call and each completed milestone.
+
+    Recorded responses are served back by request key, in recording order, so
+    a run driven by the same inputs issues the same requests and gets the same
+    answers. With strict=True (replay) a missing response is an error and
+    nothing is written; otherwise (record or resume) new calls are appended.
+    """
+
+    def __init__(self, path: str, strict: bool = False):
+        self.path = path
+        self.strict = strict
+        self.header: Optional[Dict] = None
+        self.milestones: List[Dict] = []
+        self.finished = False
+        self._responses: Dict[str, deque] = defaultdict(deque)
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            if self.strict:
+                raise FileNotFoundError(f"No transcript at {self.path}")
+            return
+        for record in read_records(self.path):
+            kind = record.get("type")
+            if kind == "run":
+                self.header = record
+            elif kind == "call":
+                self._responses[record["key"]].append(record["text"])
+            elif kind == "milestone":
+                self.milestones.append(record)
+            elif kind == "run_end":
+                self.finished = True
+
+    @property
+    def completed_milestones(self) -> List[str]:
+        return [record["task"] for record in self.milestones]
+
+    def lookup(self, key: str) -> Optional[str]:
+        """Next recorded response for a request key, or None if there is none left"""
+        with self._lock:
+            responses = self._responses.get(key)
+            if responses:
+                return responses.popleft()
+        if self.strict:
+            raise ReplayMismatch(f"No recorded response for request {key[:12]}; the run has diverged "
+                                 "from the transcript")
+        return None
+
+    def record(self, kind: str, **fields):
+        if self.strict:
+            return
+        record = {"type": kind, "time": time.time(), **fields}
+        line = json.dumps(record, default=str, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open_append(self.path) as f:
+                f.write(line)
+            if kind == "run":
+                self.header = record
+            elif kind == "milestone":
+                self.milestones.append(record)
+
+    def record_call(self, key: str, agent: str, request: Dict, text: str):
+        self.record("call", key=key, agent=agent, model=request["model"], max_tokens=request["max_tokens"],
+                    prompt=request["messages"][-1]["content"], text=text)
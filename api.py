@@ -1,51 +1,152 @@
-from fastapi import FastAPI, Request, Form
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, Request, Form, HTTPException, Query
+from fastapi.responses import HTMLResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from typing import Optional
+from contextlib import asynccontextmanager
 import os
 import uvicorn
-from sim import StartupSimulation
+from jobs import JobManager, JobQueueFull
+from events import format_sse
+from viz import MEDIA_TYPES, SimulationVisualizer
+from sim import AGENT_INFO
+from telemetry import render_metrics
+from history import get_history
 import asyncio
-import base64
+import hashlib
 
-app = FastAPI(title="AI Startup Simulator")
+# SIM_HEADLESS=1 skips charts entirely; results pages then show text output only
+HEADLESS = os.getenv("SIM_HEADLESS", "") not in ("", "0")
+
+# Simulations run on a bounded worker pool so the event loop keeps serving requests
+jobs = JobManager(max_workers=int(os.getenv("SIM_WORKERS", "4")), visualize=not HEADLESS, history=get_history())
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Render the static team graph once so the first simulations don't pay for it
+    if not HEADLESS:
+        await asyncio.to_thread(SimulationVisualizer.warm_graph_cache, AGENT_INFO)
+    yield
+    jobs.shutdown(wait=False)
+
+app = FastAPI(title="AI Startup Simulator", lifespan=lifespan)
 
 # Set up static files and templates
 os.makedirs("static", exist_ok=True)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
+def _get_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
-@app.post("/simulate", response_class=HTMLResponse)
-async def simulate(request: Request, product: str = Form(...)):
-    # Run simulation
-    simulation = StartupSimulation(product)
-    simulation.run()
-    
-    # Get paths to generated visualizations
-    metrics_path = "startup_metrics.png"
-    graph_path = "agent_relationships.png"
-    
-    # Read images for display
-    with open(metrics_path, "rb") as f:
-        metrics_img = base64.b64encode(f.read()).decode()
-    
-    with open(graph_path, "rb") as f:
-        graph_img = base64.b64encode(f.read()).decode()
-    
+@app.post("/simulate", status_code=202)
+async def simulate(product: str = Form(...), stream: bool = Form(False)):
+    try:
+        job = jobs.submit(product, stream_tokens=stream)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {
+        "job_id": job.id,
+        "status_url": f"/jobs/{job.id}",
+        "view_url": f"/jobs/{job.id}/view",
+        "events_url": f"/jobs/{job.id}/events"
+    }
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    return _get_job(job_id).to_dict()
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(request: Request, job_id: str):
+    """Stream the job's progress events as Server-Sent Events"""
+    job = _get_job(job_id)
+    # Reconnecting EventSource clients resume after the last event they saw
+    last_id = request.headers.get("last-event-id")
+    start = int(last_id) + 1 if last_id and last_id.isdigit() else 0
+
+    async def stream():
+        index = start
+        while True:
+            closed = job.events.closed
+            for event in job.events.since(index):
+                yield format_sse(event, index)
+                index += 1
+            if closed:
+                break
+            if await request.is_disconnected():
+                break
+            await asyncio.sleep(0.1)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+@app.get("/jobs/{job_id}/view", response_class=HTMLResponse)
+async def job_view(request: Request, job_id: str):
+    job = _get_job(job_id)
     return templates.TemplateResponse(
         "results.html", 
         {
             "request": request,
-            "product": product,
-            "metrics_img": metrics_img,
-            "graph_img": graph_img
+            "product": job.product,
+            "job": job
         }
     )
 
+@app.get("/artifacts/{run_id}/{name}")
+async def artifact(request: Request, run_id: str, name: str):
+    """Serve a rendered chart; the bytes of a finished run never change, so clients may cache them"""
+    job = jobs.get(run_id)
+    # Jobs no longer held in memory, and runs from the CLI or batches, are served from the run history
+    if job is not None:
+        data = job.artifacts.get(name)
+    else:
+        data = await asyncio.to_thread(get_history().artifact, run_id, name)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    etag = f'"{hashlib.sha256(data).hexdigest()[:32]}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    media_type = MEDIA_TYPES.get(name.rsplit(".", 1)[-1], "application/octet-stream")
+    return Response(content=data, media_type=media_type, headers=headers)
+
+@app.get("/runs")
+async def list_runs(limit: int = Query(20, ge=1, le=200), offset: int = Query(0, ge=0),
+                    product: Optional[str] = None):
+    """Stored runs, newest first; product narrows the list to one product idea"""
+    page = await asyncio.to_thread(get_history().list, limit, offset, product)
+    if offset + limit < page["total"]:
+        page["next_offset"] = offset + limit
+    return page
+
+@app.get("/runs/compare")
+async def compare_runs(ids: str = Query(..., description="Comma-separated run IDs")):
+    """Side-by-side projections, final outputs and token costs of stored runs"""
+    run_ids = [run_id for run_id in ids.split(",") if run_id]
+    try:
+        return await asyncio.to_thread(get_history().compare, run_ids)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Run {e.args[0]} not found")
+
+@app.get("/runs/{run_id}")
+async def get_run(run_id: str):
+    run = await asyncio.to_thread(get_history().get, run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    run["artifact_urls"] = {name: f"/artifacts/{run_id}/{name}" for name in run["artifacts"]}
+    return run
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """LLM call and milestone metrics in the Prometheus text format"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     uvicorn.run("api:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
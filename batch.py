@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, Optional, Set, TextIO, Tuple
+
+from sim import StartupSimulation
+from events import NullSink
+from metrics_store import MetricsStore
+from history import RunHistory
+from agents.client import run_in_background_loop
+from agents.jsonl import open_append, read_records
+
+
+def idea_id(product: str) -> str:
+    """Stable ID for a plain-text idea so interrupted batches can be resumed"""
+    return hashlib.sha1(product.encode("utf-8")).hexdigest()[:16]
+
+
+def read_ideas(stream: TextIO) -> Iterator[Tuple[str, str]]:
+    """Yield (id, product) pairs from plain-text lines or JSONL objects with id/product keys"""
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("{"):
+            record = json.loads(line)
+            product = record["product"]
+            yield str(record.get("id") or idea_id(product)), product
+        else:
+            yield idea_id(line), line
+
+
+def completed_ids(output_path: str) -> Set[str]:
+    """IDs already written successfully; failed runs are retried on resume"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    for record in read_records(output_path):
+        if record.get("status") == "completed":
+            done.add(record["id"])
+    return done
+
+
+def _simulate(id_: str, product: str, artifacts_dir: str, max_concurrency: int, use_cache: bool,
+              batched_prompts: bool, visualize: bool, history: Optional[RunHistory]) -> Dict:
+    start = time.time()
+    record = {"id": id_, "product": product, "started_at": start}
+    try:
+        simulation = StartupSimulation(product, max_concurrency=max_concurrency, use_cache=use_cache,
+                                       output_dir=os.path.join(artifacts_dir, id_), event_sink=NullSink(),
+                                       batched_prompts=batched_prompts, visualize=visualize)
+        result = run_in_background_loop(simulation.arun())
+        record.update(result)
+        if history is not None:
+            # Charts are already under artifacts_dir; keeping thousands of copies in the database would bloat it
+            history.record(simulation.run_id, result, started_at=start)
+        record["status"] = "completed"
+    except Exception as e:
+        record["status"] = "failed"
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["duration"] = time.time() - start
+    return record
+
+
+def run_batch(ideas: Iterable[Tuple[str, str]], output_path: str, parallelism: int = 4,
+              artifacts_dir: str = os.path.join("runs", "batch"), max_concurrency: int = 4,
+              use_cache: bool = True, metrics_path: Optional[str] = None, batched_prompts: bool = False,
+              visualize: bool = True, history: Optional[RunHistory] = None) -> Dict:
+    """Run many simulations, appending one JSONL record per idea as each finishes.
+
+    Each completed run is also stored in history when one is given, without its
+    charts, which are written under artifacts_dir. With metrics_path, the metrics
+    of every run completed in this invocation are also stacked into one
+    MetricsStore and saved as .npz for cross-run analysis.
+    """
+    skip = completed_ids(output_path)
+    counts = {"completed": 0, "failed": 0, "skipped": 0}
+    started = time.time()
+    stores = []
+
+    with open_append(output_path) as out, \
+            ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix="batch") as executor:
+        def drain(pending, return_when):
+            finished, pending = wait(pending, return_when=return_when)
+            for future in finished:
+                record = future.result()
+                out.write(json.dumps(record, default=str) + "\n")
+                out.flush()
+                counts[record["status"]] += 1
+                if metrics_path and record["status"] == "completed":
+                    stores.append(MetricsStore.from_dict(record["metrics"]))
+                print(f"[{counts['completed'] + counts['failed']}] {record['id']} {record['status']} "
+                      f"in {record['duration']:.1f}s", file=sys.stderr)
+            return pending
+
+        pending = set()
+        seen = set()
+        for id_, product in ideas:
+            if id_ in skip or id_ in seen:
+                counts["skipped"] += 1
+                continue
+            seen.add(id_)
+            # Keep only a bounded number of ideas in flight rather than queueing the whole file
+            if len(pending) >= parallelism * 2:
+                pending = drain(pending, FIRST_COMPLETED)
+            pending.add(executor.submit(_simulate, id_, product, artifacts_dir, max_concurrency, use_cache,
+                                        batched_prompts, visualize, history))
+        drain(pending, ALL_COMPLETED)
+
+    if metrics_path and stores:
+        MetricsStore.concat(stores).to_npz(metrics_path)
+    counts["duration"] = time.time() - started
+    print(f"Batch finished: {counts['completed']} completed, {counts['failed']} failed, "
+          f"{counts['skipped']} skipped in {counts['duration']:.1f}s", file=sys.stderr)
+    return counts
@@ -0,0 +1,56 @@
+"""Compare two benchmark result files and flag changes beyond a threshold.
+
+    python -m bench.compare bench/results/old.json bench/results/new.json --threshold 10
+"""
+import argparse
+import json
+import sys
+from typing import Dict, Iterator, Tuple
+
+# Metrics where a larger value is better; everything else (times, bytes) should shrink
+HIGHER_IS_BETTER = ("throughput_per_second",)
+
+
+def _leaves(tree: Dict, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    for key, value in tree.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            yield from _leaves(value, path)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield path, float(value)
+
+
+def compare(old: Dict, new: Dict, threshold: float) -> int:
+    """Print every shared metric with its change; returns the number of regressions"""
+    before = dict(_leaves(old["results"]))
+    after = dict(_leaves(new["results"]))
+    regressions = 0
+    print(f"{'metric':<60} {'old':>12} {'new':>12} {'change':>9}")
+    for path in sorted(before.keys() & after.keys()):
+        # Percentile summaries of tiny samples are noisy; compare the headline numbers only
+        if path.endswith((".n", ".min", ".max")) or ".samples" in path:
+            continue
+        old_value, new_value = before[path], after[path]
+        change = (new_value - old_value) / old_value * 100 if old_value else 0.0
+        worse = -change if path.endswith(HIGHER_IS_BETTER) else change
+        flag = ""
+        if worse > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif worse < -threshold:
+            flag = "  improved"
+        print(f"{path:<60} {old_value:>12.4g} {new_value:>12.4g} {change:>+8.1f}%{flag}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Percent change counted as a regression")
+    args = parser.parse_args()
+    with open(args.old, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+    sys.exit(1 if compare(old, new, args.threshold) else 0)
@@ -0,0 +1,252 @@
+"""Deterministic local stand-in for the Anthropic Messages API.
+
+Use it in-process (install() routes the shared clients through httpx mock
+transports) or as a small HTTP server for the CLI and web app:
+
+    python -m bench.fake_anthropic --port 8001
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8001 ANTHROPIC_API_KEY=fake python sim.py --product "..."
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from agents.client import CHARS_PER_TOKEN, use_transport
+
+_WORDS = ("market", "users", "growth", "launch", "feature", "team", "product", "revenue", "scale",
+          "platform", "customers", "roadmap", "focus", "build", "test", "iterate", "pricing", "value")
+_SENTENCE_WORDS = 12
+
+# (seconds to wait before sending, bytes) pieces of a response body
+Chunks = List[Tuple[float, bytes]]
+
+
+class FakeConfig:
+    """Latency, size and failure behaviour of the fake API"""
+
+    def __init__(self, latency: float = 0.2, jitter: float = 0.05, output_tokens: int = 150,
+                 error_rate: float = 0.0, error_status: int = 529, seed: int = 0, token_latency: float = 0.0):
+        # Mean response time in seconds and the +/- uniform spread around it
+        self.latency = latency
+        self.jitter = jitter
+        # Generation time per output token; streamed responses are paced word by word
+        self.token_latency = token_latency
+        # Completion length; capped by the request's max_tokens
+        self.output_tokens = output_tokens
+        # Share of requests answered with error_status instead of a message
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.seed = seed
+
+
+class FakeMessagesAPI:
+    """Answers POST /v1/messages with text derived from a hash of the request.
+
+    The same request always gets the same text and token counts; latency jitter
+    and injected errors come from a seeded generator.
+    """
+
+    def __init__(self, config: Optional[FakeConfig] = None):
+        self.config = config or FakeConfig()
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def draw(self) -> Tuple[float, bool]:
+        """Count a request and pick its latency and whether it fails"""
+        with self._lock:
+            self.requests += 1
+            delay = self.config.latency + self._rng.uniform(-self.config.jitter, self.config.jitter)
+            failed = self._rng.random() < self.config.error_rate
+            if failed:
+                self.errors += 1
+        return max(delay, 0.0), failed
+
+    def _message(self, payload: Dict) -> Dict:
+        digest = hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).digest()
+        rng = random.Random(digest)
+        output_tokens = min(self.config.output_tokens, payload.get("max_tokens", self.config.output_tokens))
+        # Roughly one token per short word, so the rate limiter's estimates stay realistic
+        words = [rng.choice(_WORDS) for _ in range(max(output_tokens, 1))]
+        text = " ".join(" ".join(words[i:i + _SENTENCE_WORDS]).capitalize() + "."
+                        for i in range(0, len(words), _SENTENCE_WORDS))
+        prompt_chars = sum(len(message["content"]) for message in payload.get("messages", []))
+        return {
+            "id": "msg_" + digest.hex()[:24],
+            "type": "message",
+            "role": "assistant",
+            "model": payload.get("model", "fake"),
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": prompt_chars // CHARS_PER_TOKEN + 1, "output_tokens": output_tokens},
+        }
+
+    def _error_body(self) -> Dict:
+        return {"type": "error", "error": {"type": "overloaded_error", "message": "Injected failure"}}
+
+    def respond(self, body: bytes, failed: bool) -> Tuple[int, Dict[str, str], Chunks]:
+        """Status, headers and paced body chunks for a request that has already waited its latency"""
+        if failed:
+            return self.config.error_status, {"content-type": "application/json"}, \
+                [(0.0, json.dumps(self._error_body()).encode("utf-8"))]
+        payload = json.loads(body)
+        message = self._message(payload)
+        if payload.get("stream"):
+            return 200, {"content-type": "text/event-stream"}, _sse(message, self.config.token_latency)
+        generation = message["usage"]["output_tokens"] * self.config.token_latency
+        return 200, {"content-type": "application/json"}, [(generation, json.dumps(message).encode("utf-8"))]
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        delay, failed = self.draw()
+        time.sleep(delay)
+        status, headers, chunks = self.respond(request.read(), failed)
+
+        def paced():
+            for wait, chunk in chunks:
+                time.sleep(wait)
+                yield chunk
+
+        return httpx.Response(status, headers=headers, content=paced())
+
+    async def ahandle(self, request: httpx.Request) -> httpx.Response:
+        delay, failed = self.draw()
+        await asyncio.sleep(delay)
+        status, headers, chunks = self.respond(await request.aread(), failed)
+
+        async def paced():
+            for wait, chunk in chunks:
+                await asyncio.sleep(wait)
+                yield chunk
+
+        return httpx.Response(status, headers=headers, content=paced())
+
+
+def _sse(message: Dict, token_latency: float = 0.0) -> Chunks:
+    """Replay a message as the Messages API streaming event sequence, one chunk per event.
+
+    Each text delta waits token_latency, so a client that stops reading early saves the rest.
+    """
+    text = message["content"][0]["text"]
+    events = [
+        ("message_start", {"type": "message_start",
+                           "message": {**message, "content": [],
+                                       "usage": {**message["usage"], "output_tokens": 0}}}),
+        ("content_block_start", {"type": "content_block_start", "index": 0,
+                                 "content_block": {"type": "text", "text": ""}}),
+    ]
+    words = text.split(" ")
+    for i, word in enumerate(words):
+        delta = word if i == len(words) - 1 else word + " "
+        events.append(("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                               "delta": {"type": "text_delta", "text": delta}}))
+    events += [
+        ("content_block_stop", {"type": "content_block_stop", "index": 0}),
+        ("message_delta", {"type": "message_delta", "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                           "usage": {"output_tokens": message["usage"]["output_tokens"]}}),
+        ("message_stop", {"type": "message_stop"}),
+    ]
+    return [(token_latency if name == "content_block_delta" else 0.0,
+             f"event: {name}\ndata: {json.dumps(data)}\n\n".encode("utf-8")) for name, data in events]
+
+
+def install(config: Optional[FakeConfig] = None) -> FakeMessagesAPI:
+    """Route every pooled client in this process to a new fake API and return it"""
+    api = FakeMessagesAPI(config)
+    os.environ.setdefault("ANTHROPIC_API_KEY", "fake-key")
+    use_transport(httpx.MockTransport(api.handle), httpx.MockTransport(api.ahandle))
+    return api
+
+
+def uninstall():
+    use_transport(None, None)
+
+
+def serve(api: FakeMessagesAPI, host: str = "127.0.0.1", port: int = 8001) -> ThreadingHTTPServer:
+    """Serve the fake API over HTTP on a background thread; call shutdown() on the result to stop"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("content-length", 0)))
+            if not self.path.rstrip("/").endswith("/v1/messages"):
+                self._send(404, {"content-type": "application/json"}, b'{"type":"error"}')
+                return
+            delay, failed = api.draw()
+            time.sleep(delay)
+            status, headers, chunks = api.respond(body, failed)
+            if len(chunks) == 1:
+                time.sleep(chunks[0][0])
+                self._send(status, headers, chunks[0][1])
+                return
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("transfer-encoding", "chunked")
+            self.end_headers()
+            try:
+                for wait, chunk in chunks:
+                    time.sleep(wait)
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                    self.wfile.flush()
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                # The client stopped reading, e.g. a streamed call that ended early
+                self.close_connection = True
+
+        def _send(self, status: int, headers: Dict[str, str], content: bytes):
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("content-length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-anthropic", daemon=True).start()
+    return server
+
+
+def add_config_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency", type=float, default=0.2, help="Mean response time in seconds")
+    parser.add_argument("--jitter", type=float, default=0.05, help="Uniform +/- spread around the latency")
+    parser.add_argument("--output-tokens", type=int, default=150, help="Completion length in tokens")
+    parser.add_argument("--token-latency", type=float, default=0.0,
+                        help="Seconds per generated token; streamed responses are paced word by word")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests that fail")
+    parser.add_argument("--error-status", type=int, default=529, help="HTTP status of injected failures")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def config_from_args(args: argparse.Namespace) -> FakeConfig:
+    return FakeConfig(latency=args.latency, jitter=args.jitter, output_tokens=args.output_tokens,
+                      error_rate=args.error_rate, error_status=args.error_status, seed=args.seed,
+                      token_latency=args.token_latency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the fake Anthropic Messages API over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+    server = serve(FakeMessagesAPI(config_from_args(args)), args.host, args.port)
+    print(f"Fake Anthropic API on http://{args.host}:{args.port} (set ANTHROPIC_BASE_URL to use it)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,69 @@
+"""Import-time regression checks.
+
+Each entry-point module is imported in a fresh interpreter; the check fails if
+one pulls in a module that should only load on first use, or if its median
+import time exceeds the budget.
+
+    python -m bench.imports --budget 0.5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+# Modules each entry point must not import eagerly
+LAZY_MODULES = {
+    "sim": ["matplotlib", "anthropic", "httpx", "graphviz"],
+    "batch": ["matplotlib", "anthropic", "httpx", "graphviz"],
+    "jobs": ["matplotlib", "anthropic", "graphviz"],
+    "api": ["matplotlib", "anthropic", "graphviz"],
+}
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [name for name in {lazy!r} if name in sys.modules]}}))
+"""
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def probe(module: str, lazy: List[str]) -> Dict:
+    """Import module in a fresh interpreter; returns its import time and which lazy modules it loaded"""
+    env = dict(os.environ, ANTHROPIC_API_KEY=os.getenv("ANTHROPIC_API_KEY", "fake-key"))
+    output = subprocess.run([sys.executable, "-c", _PROBE.format(module=module, lazy=lazy)], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def check_imports(repeat: int = 5, budget: float = 0.0) -> Dict:
+    """Median import time per entry point plus any eagerly loaded lazy modules; budget 0 disables the time check"""
+    results = {}
+    for module, lazy in LAZY_MODULES.items():
+        probes = [probe(module, lazy) for _ in range(repeat)]
+        median = statistics.median(p["seconds"] for p in probes)
+        loaded = sorted({name for p in probes for name in p["loaded"]})
+        results[module] = {
+            "median_seconds": median,
+            "eager_imports": loaded,
+            "ok": not loaded and (budget <= 0 or median <= budget),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that entry points import quickly and lazily")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=0.0, help="Max median import seconds (0 disables)")
+    args = parser.parse_args()
+    results = check_imports(args.repeat, args.budget)
+    for module, result in results.items():
+        status = "ok" if result["ok"] else "FAIL"
+        eager = f", eagerly imports {', '.join(result['eager_imports'])}" if result["eager_imports"] else ""
+        print(f"{status:<5} {module:<8} {result['median_seconds'] * 1000:7.1f} ms{eager}")
+    sys.exit(0 if all(result["ok"] for result in results.values()) else 1)
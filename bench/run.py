@@ -0,0 +1,296 @@
+"""Offline benchmark suite; every API call goes to the in-process fake.
+
+    python -m bench.run                     # full suite, results in bench/results/
+    python -m bench.run --quick --only viz  # smaller sizes, one benchmark
+    python -m bench.compare old.json new.json
+    python -m bench.imports                 # fail if an entry point imports heavy modules eagerly
+"""
+import argparse
+import os
+import tempfile
+
+# Benchmarks measure the simulator, not the shared rate limiter or a warm response cache, and keep
+# their runs out of the local run history
+os.environ.setdefault("SIM_REQUESTS_PER_MINUTE", "1000000")
+os.environ.setdefault("SIM_TOKENS_PER_MINUTE", "1000000000")
+os.environ.setdefault("SIM_CACHE_DIR", tempfile.mkdtemp(prefix="sim-bench-"))
+os.environ.setdefault("SIM_HISTORY_DB", os.path.join(os.environ["SIM_CACHE_DIR"], "history.sqlite3"))
+os.environ.setdefault("ANTHROPIC_API_KEY", "fake-key")
+
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from bench.fake_anthropic import add_config_arguments, config_from_args, install
+from bench.imports import check_imports
+
+
+def _summary(samples: List[float]) -> Dict:
+    values = np.asarray(samples, dtype=np.float64)
+    return {
+        "n": len(samples),
+        "mean": float(values.mean()),
+        "p50": float(np.percentile(values, 50)),
+        "p99": float(np.percentile(values, 99)),
+        "min": float(values.min()),
+        "max": float(values.max()),
+    }
+
+
+def _timed(fn: Callable, repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def rss_bytes() -> int:
+    """Current resident set size; falls back to the peak where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def bench_cli(repeat: int, concurrency: int) -> Dict:
+    """Single-run latency of the serial path (CLI default) and the concurrent path"""
+    from sim import StartupSimulation
+    from events import NullSink
+
+    def simulation(i: int, **kwargs):
+        return StartupSimulation(f"Benchmark idea {i}", use_cache=False, output_dir=None,
+                                 event_sink=NullSink(), **kwargs)
+
+    counter = iter(range(10 ** 9))
+    serial = _timed(lambda: simulation(next(counter)).run(), repeat)
+    concurrent = _timed(lambda: asyncio.run(simulation(next(counter), max_concurrency=concurrency).arun()), repeat)
+    return {"serial_seconds": _summary(serial), "concurrent_seconds": _summary(concurrent),
+            "concurrency": concurrency}
+
+
+def bench_generation(fake, repeat: int, output_tokens: int = 400, token_latency: float = 0.002) -> Dict:
+    """Serial run latency and tokens with the default generation profiles versus uncapped, unstreamed calls.
+
+    The fake is made verbose and slow per token for the duration, like a model that overshoots its word limit.
+    """
+    from sim import StartupSimulation
+    from events import NullSink
+    from agents.generation import PROFILES, GenerationProfile
+
+    uncapped = {kind: GenerationProfile(max(profile.max_tokens, 1000)) for kind, profile in PROFILES.items()}
+    saved = fake.config.output_tokens, fake.config.token_latency
+    fake.config.output_tokens, fake.config.token_latency = output_tokens, token_latency
+    counter = iter(range(10 ** 9))
+    results = {}
+    try:
+        for name, profiles in (("profiles", PROFILES), ("uncapped", uncapped)):
+            tokens = []
+
+            def run():
+                sim = StartupSimulation(f"Generation idea {next(counter)}", use_cache=False, output_dir=None,
+                                        event_sink=NullSink(), visualize=False)
+                for agent in sim.agents:
+                    agent.profiles = dict(profiles)
+                sim.run()
+                tokens.append(sum(entry["output_tokens"] for entry in sim.profile.summary().values()))
+
+            seconds = _timed(run, repeat)
+            results[name] = {"seconds": _summary(seconds), "output_tokens": _summary(tokens)}
+    finally:
+        fake.config.output_tokens, fake.config.token_latency = saved
+    return results
+
+
+def _run_jobs(client, products: List[str], poll: float = 0.05) -> List[Dict]:
+    ids = [client.post("/simulate", data={"product": product}).json()["job_id"] for product in products]
+    pending = set(ids)
+    jobs = {}
+    while pending:
+        time.sleep(poll)
+        for job_id in list(pending):
+            job = client.get(f"/jobs/{job_id}").json()
+            if job["status"] in ("completed", "failed"):
+                jobs[job_id] = job
+                pending.discard(job_id)
+    return [jobs[job_id] for job_id in ids]
+
+
+def bench_api(levels: List[int], requests: int) -> Dict:
+    """/simulate throughput and end-to-end job latency at several worker pool sizes"""
+    from fastapi.testclient import TestClient
+    import api
+    from jobs import JobManager
+
+    results = {}
+    for workers in levels:
+        api.jobs = JobManager(max_workers=workers, max_queued=requests)
+        with TestClient(api.app) as client:
+            start = time.perf_counter()
+            jobs = _run_jobs(client, [f"Throughput idea {workers}-{i}" for i in range(requests)])
+            wall = time.perf_counter() - start
+        latencies = [job["finished_at"] - job["created_at"] for job in jobs]
+        results[str(workers)] = {
+            "requests": requests,
+            "failed": sum(job["status"] == "failed" for job in jobs),
+            "wall_seconds": wall,
+            "throughput_per_second": requests / wall,
+            "latency_seconds": _summary(latencies),
+        }
+    return results
+
+
+def bench_memory(requests: int, workers: int, samples: int = 5) -> Dict:
+    """Resident memory growth while serving many /simulate requests"""
+    from fastapi.testclient import TestClient
+    import api
+    from jobs import JobManager
+
+    api.jobs = JobManager(max_workers=workers, max_queued=requests)
+    batch = max(requests // samples, 1)
+    points = []
+    with TestClient(api.app) as client:
+        # One warm-up job so imports, font caches and pools are not counted as growth
+        _run_jobs(client, ["Memory warm-up idea"])
+        baseline = rss_bytes()
+        done = 0
+        while done < requests:
+            size = min(batch, requests - done)
+            _run_jobs(client, [f"Memory idea {done + i}" for i in range(size)])
+            done += size
+            points.append({"requests": done, "rss_bytes": rss_bytes()})
+    slope = np.polyfit([p["requests"] for p in points], [p["rss_bytes"] for p in points], 1)[0] \
+        if len(points) > 1 else 0.0
+    return {
+        "requests": requests,
+        "baseline_rss_bytes": baseline,
+        "final_rss_bytes": points[-1]["rss_bytes"],
+        "growth_bytes": points[-1]["rss_bytes"] - baseline,
+        "growth_bytes_per_request": float(slope),
+        "samples": points,
+    }
+
+
+def bench_viz(repeat: int) -> Dict:
+    """Render time of the metrics chart and of the team graph, cold and memoized"""
+    import viz
+    from viz import SimulationVisualizer
+    from metrics_store import MetricsStore
+    from montecarlo import percentile_bands, simulate_trajectories
+    from sim import AGENT_INFO
+
+    bands = percentile_bands(simulate_trajectories(2000, seed=0))
+    metrics = MetricsStore.from_arrays({metric: band[50] for metric, band in bands.items()})
+    chart = _timed(lambda: SimulationVisualizer.render_startup_metrics(metrics, bands), repeat)
+
+    def cold_graph():
+        viz._graph_cache.clear()
+        viz.GRAPH_CACHE_DIR = tempfile.mkdtemp(prefix="sim-bench-graphs-")
+        SimulationVisualizer.render_agent_relationship_graph(AGENT_INFO)
+
+    cold = _timed(cold_graph, repeat)
+    warm = _timed(lambda: SimulationVisualizer.render_agent_relationship_graph(AGENT_INFO), repeat)
+    return {"metrics_chart_seconds": _summary(chart), "team_graph_cold_seconds": _summary(cold),
+            "team_graph_warm_seconds": _summary(warm)}
+
+
+def bench_history(runs: int, repeat: int) -> Dict:
+    """Latency of run history listing, product lookup, single-run reads and comparisons"""
+    from sim import StartupSimulation
+    from events import NullSink
+    from history import RunHistory
+
+    sim = StartupSimulation("History idea", use_cache=False, output_dir=None, event_sink=NullSink(), visualize=False)
+    result = sim.run()
+    history = RunHistory(os.path.join(tempfile.mkdtemp(prefix="sim-bench-history-"), "history.sqlite3"))
+    ids = [f"run-{i}" for i in range(runs)]
+    start = time.perf_counter()
+    for i, run_id in enumerate(ids):
+        history.record(run_id, {**result, "product": f"History idea {i % 50}"})
+    record_seconds = (time.perf_counter() - start) / runs
+    compared = ids[:4]
+    return {
+        "runs": runs,
+        "record_seconds": record_seconds,
+        "list_seconds": _summary(_timed(lambda: history.list(limit=20, offset=runs // 2), repeat)),
+        "product_seconds": _summary(_timed(lambda: history.list(product="history idea 7"), repeat)),
+        "get_seconds": _summary(_timed(lambda: history.get(ids[-1]), repeat)),
+        "compare_seconds": _summary(_timed(lambda: history.compare(compared), repeat)),
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+BENCHMARKS = ("imports", "cli", "api", "memory", "viz", "generation", "history")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite against the fake API")
+    parser.add_argument("--only", action="append", choices=BENCHMARKS, help="Run only these benchmarks")
+    parser.add_argument("--quick", action="store_true", help="Smaller sizes for a fast smoke run")
+    parser.add_argument("--output", help="Results file (default bench/results/bench-<time>.json)")
+    parser.add_argument("--levels", default="1,2,4,8", help="Worker pool sizes for the /simulate benchmark")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    fake = install(config_from_args(args))
+    selected = args.only or list(BENCHMARKS)
+    levels = [int(level) for level in args.levels.split(",")]
+    repeat = 2 if args.quick else 5
+    requests = 8 if args.quick else 32
+
+    results = {}
+    for name in selected:
+        print(f"Running {name}...", file=sys.stderr)
+        start = time.perf_counter()
+        if name == "imports":
+            results[name] = check_imports(repeat)
+        elif name == "cli":
+            results[name] = bench_cli(repeat, concurrency=4)
+        elif name == "api":
+            results[name] = bench_api(levels, requests)
+        elif name == "memory":
+            results[name] = bench_memory(requests * 2, workers=4)
+        elif name == "viz":
+            results[name] = bench_viz(repeat * 4)
+        elif name == "generation":
+            results[name] = bench_generation(fake, repeat)
+        elif name == "history":
+            results[name] = bench_history(requests * 50, repeat * 10)
+        print(f"  done in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": args.quick,
+            "fake_api": vars(fake.config),
+            "api_requests": fake.requests,
+            "api_errors": fake.errors,
+            "monte_carlo_runs": int(os.getenv("SIM_MONTE_CARLO_RUNS", "100000")),
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(os.path.dirname(__file__), "results",
+                                         f"bench-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}", file=sys.stderr)
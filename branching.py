@@ -0,0 +1,94 @@
+import asyncio
+from typing import Any, Dict, Optional
+
+from sim import StartupSimulation
+
+COST_KEYS = ("calls", "cached", "input_tokens", "output_tokens")
+
+
+def _cost(sim: StartupSimulation) -> Dict[str, int]:
+    """LLM calls and tokens counted by a run's profile"""
+    totals = dict.fromkeys(COST_KEYS, 0)
+    for entry in sim.profile.summary().values():
+        for key in COST_KEYS:
+            totals[key] += entry[key]
+    return totals
+
+
+def _branch_overrides(task: str, options) -> Dict[str, Dict[str, Any]]:
+    return {str(option): {task: option} for option in options}
+
+
+def explore(sim: StartupSimulation, after: str, task: str, options) -> Dict[str, StartupSimulation]:
+    """Run sim through milestone after, then one branch per option for task's result, one at a time"""
+    sim.run(until=after)
+    branches = {name: sim.fork(overrides, name=name) for name, overrides in _branch_overrides(task, options).items()}
+    for branch in branches.values():
+        branch.run()
+    return branches
+
+
+async def aexplore(sim: StartupSimulation, after: str, task: str, options) -> Dict[str, StartupSimulation]:
+    """Async explore(): the shared prefix runs once and the branches run concurrently"""
+    await sim.arun(until=after)
+    branches = {name: sim.fork(overrides, name=name) for name, overrides in _branch_overrides(task, options).items()}
+    await asyncio.gather(*(branch.arun() for branch in branches.values()))
+    return branches
+
+
+def compare_branches(sim: StartupSimulation, branches: Dict[str, StartupSimulation],
+                     after: Optional[str] = None) -> Dict:
+    """Side-by-side report of branches forked from sim: projections, divergent outputs and cost.
+
+    The shared prefix is paid for once; running every branch from scratch
+    would have cost its calls again for each extra branch.
+    """
+    names = sim.plan.milestone_names
+    divergent = names[names.index(after) + 1:] if after in names else names
+    shared = {**_cost(sim), "seconds": sim.timings.get("total", 0.0)}
+    report = {"product": sim.product, "after": after, "shared": shared, "branches": {}}
+    for name, branch in branches.items():
+        report["branches"][name] = {
+            "overrides": branch.overrides,
+            "strategy": branch.strategy,
+            "day_30": {metric: {p: float(values[-1]) for p, values in band.items()}
+                       for metric, band in branch.metric_bands.items()},
+            "outputs": {milestone: branch.outputs[milestone] for milestone in divergent if milestone in branch.outputs},
+            **_cost(branch),
+            "seconds": branch.timings.get("total", 0.0) - shared["seconds"],
+        }
+    report["calls_saved"] = shared["calls"] * max(len(branches) - 1, 0)
+    return report
+
+
+def _cell(value: Any, width: int) -> str:
+    text = " ".join(str(value).split())
+    return text if len(text) <= width else text[:width - 1] + "…"
+
+
+def format_comparison(report: Dict, width: int = 28) -> str:
+    """Plain-text table with one column per branch"""
+    branches = report["branches"]
+    rows = [("", list(branches))]
+    rows.append(("strategy", [b["strategy"] or "baseline" for b in branches.values()]))
+    first = next(iter(branches.values()), None)
+    for metric in (first["day_30"] if first else {}):
+        rows.append((f"{metric} (day 30)", [
+            "{:.2f} ({:.2f}-{:.2f})".format(*(b["day_30"][metric][p] for p in (50, 5, 95)))
+            for b in branches.values()]))
+    # Outputs of the last divergent milestone, e.g. the CEO's post-launch decision
+    if first and first["outputs"]:
+        last = list(first["outputs"])[-1]
+        for key in first["outputs"][last]:
+            rows.append((key, [b["outputs"].get(last, {}).get(key, "") for b in branches.values()]))
+    rows.append(("calls (cached)", [f"{b['calls']} ({b['cached']})" for b in branches.values()]))
+    rows.append(("tokens in/out", [f"{b['input_tokens']}/{b['output_tokens']}" for b in branches.values()]))
+    rows.append(("seconds", [f"{b['seconds']:.1f}" for b in branches.values()]))
+    label_width = max(len(label) for label, _ in rows)
+    lines = [f"{label:<{label_width}}  " + "  ".join(f"{_cell(value, width):<{width}}" for value in values)
+             for label, values in rows]
+    shared = report["shared"]
+    lines.append(f"\nShared prefix through {report['after'] or 'the start'}: {shared['calls']} calls, "
+                 f"{shared['input_tokens']}/{shared['output_tokens']} tokens, {shared['seconds']:.1f}s "
+                 f"(run once; {report['calls_saved']} calls saved versus separate runs)")
+    return "\n".join(lines)
@@ -0,0 +1,66 @@
+import json
+import threading
+import time
+from typing import Callable, Dict, List
+
+# Event types emitted during a run:
+#   run_start / run_end            - the whole simulation
+#   milestone_start / milestone_end - one milestone of the plan
+#   task_start / task_end          - one task within a milestone
+#   call_start / call_end          - one LLM call made by an agent
+#   token                          - streamed text delta of an LLM call (when streaming is enabled)
+#   dialogue_turn                  - one message in an agent-to-agent dialogue
+#   log                            - human-readable progress line
+EventSink = Callable[[Dict], None]
+
+
+def make_event(event_type: str, **fields) -> Dict:
+    return {"type": event_type, "time": time.time(), **fields}
+
+
+class ConsoleSink:
+    """Prints progress the way the CLI always has; ignores machine-oriented events"""
+
+    def __call__(self, event: Dict):
+        event_type = event["type"]
+        if event_type == "log":
+            print(event["message"])
+        elif event_type == "milestone_start":
+            print(f"\n=== {event['period']}: {event['task']} ===")
+        elif event_type == "dialogue_turn":
+            print(f"  {event['speaker']}: {event['message'][:100]}...")
+
+
+class NullSink:
+    """Discards all events"""
+
+    def __call__(self, event: Dict):
+        pass
+
+
+class EventLog:
+    """Thread-safe, append-only event buffer that readers can follow by index"""
+
+    def __init__(self):
+        self._events: List[Dict] = []
+        self._lock = threading.Lock()
+        self.closed = False
+
+    def __call__(self, event: Dict):
+        with self._lock:
+            self._events.append(event)
+
+    def __len__(self):
+        return len(self._events)
+
+    def since(self, index: int) -> List[Dict]:
+        with self._lock:
+            return self._events[index:]
+
+    def close(self):
+        self.closed = True
+
+
+def format_sse(event: Dict, event_id: int) -> str:
+    """Encode an event as a Server-Sent Events message"""
+    return f"id: {event_id}\nevent: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
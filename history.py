@@ -0,0 +1,185 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+DEFAULT_HISTORY_PATH = os.getenv("SIM_HISTORY_DB", os.path.join("runs", "history.sqlite3"))
+
+# Columns returned by listings; the JSON payloads are only read for single runs and comparisons
+SUMMARY_COLUMNS = ("id", "product", "branch", "strategy", "started_at", "finished_at", "duration",
+                   "calls", "cached_calls", "input_tokens", "output_tokens")
+
+
+def product_key(product: str) -> str:
+    """Products are looked up case- and whitespace-insensitively"""
+    return " ".join(product.split()).casefold()
+
+
+def dialogues(outputs: Dict) -> Dict[str, List[Dict]]:
+    """Agent dialogues of a run by milestone"""
+    return {milestone: values["dialogue"] for milestone, values in outputs.items()
+            if isinstance(values, dict) and "dialogue" in values}
+
+
+class RunHistory:
+    """SQLite store of finished simulations, indexed by finish time and product.
+
+    Each run keeps its outputs, dialogues, metric arrays and percentile bands,
+    timings, per-milestone token profile and rendered charts, so past results
+    are served from the index instead of being simulated or rendered again.
+    """
+
+    def __init__(self, path: str = DEFAULT_HISTORY_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                id TEXT PRIMARY KEY,
+                product TEXT NOT NULL,
+                product_key TEXT NOT NULL,
+                branch TEXT,
+                strategy TEXT,
+                started_at REAL,
+                finished_at REAL NOT NULL,
+                duration REAL,
+                calls INTEGER NOT NULL,
+                cached_calls INTEGER NOT NULL,
+                input_tokens INTEGER NOT NULL,
+                output_tokens INTEGER NOT NULL,
+                outputs TEXT NOT NULL,
+                dialogues TEXT NOT NULL,
+                metrics TEXT NOT NULL,
+                metric_bands TEXT NOT NULL,
+                timings TEXT NOT NULL,
+                profile TEXT NOT NULL,
+                schedule TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS runs_finished ON runs (finished_at DESC);
+            CREATE INDEX IF NOT EXISTS runs_product ON runs (product_key, finished_at DESC);
+            CREATE TABLE IF NOT EXISTS artifacts (
+                run_id TEXT NOT NULL,
+                name TEXT NOT NULL,
+                data BLOB NOT NULL,
+                PRIMARY KEY (run_id, name)
+            );
+        """)
+        self._conn.commit()
+
+    def record(self, run_id: str, result: Dict, artifacts: Optional[Dict[str, bytes]] = None,
+               started_at: Optional[float] = None, branch: Optional[str] = None):
+        """Store a finished run: a StartupSimulation.results() dict plus its rendered charts"""
+        totals = {"calls": 0, "cached": 0, "input_tokens": 0, "output_tokens": 0}
+        for entry in result.get("profile", {}).values():
+            for key in totals:
+                totals[key] += entry.get(key, 0)
+        finished_at = time.time()
+        outputs = result.get("outputs", {})
+        row = {
+            "id": run_id,
+            "product": result["product"],
+            "product_key": product_key(result["product"]),
+            "branch": branch,
+            "strategy": result.get("strategy"),
+            "started_at": started_at,
+            "finished_at": finished_at,
+            "duration": result.get("timings", {}).get("total"),
+            "calls": totals["calls"],
+            "cached_calls": totals["cached"],
+            "input_tokens": totals["input_tokens"],
+            "output_tokens": totals["output_tokens"],
+            "outputs": _dumps(outputs),
+            "dialogues": _dumps(dialogues(outputs)),
+            "metrics": _dumps(result.get("metrics", {})),
+            "metric_bands": _dumps(result.get("metric_bands", {})),
+            "timings": _dumps(result.get("timings", {})),
+            "profile": _dumps(result.get("profile", {})),
+            "schedule": _dumps(result.get("schedule", {})),
+        }
+        columns = ", ".join(row)
+        placeholders = ", ".join("?" for _ in row)
+        with self._lock:
+            self._conn.execute(f"INSERT OR REPLACE INTO runs ({columns}) VALUES ({placeholders})", tuple(row.values()))
+            self._conn.execute("DELETE FROM artifacts WHERE run_id = ?", (run_id,))
+            self._conn.executemany("INSERT INTO artifacts (run_id, name, data) VALUES (?, ?, ?)",
+                                   [(run_id, name, data) for name, data in (artifacts or {}).items()])
+            self._conn.commit()
+
+    def list(self, limit: int = 20, offset: int = 0, product: Optional[str] = None) -> Dict:
+        """One page of run summaries, newest first, optionally for one product"""
+        where, params = ("WHERE product_key = ?", [product_key(product)]) if product else ("", [])
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM runs {where}", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM runs {where} "
+                "ORDER BY finished_at DESC LIMIT ? OFFSET ?", params + [limit, offset]
+            ).fetchall()
+        return {"total": total, "limit": limit, "offset": offset,
+                "runs": [dict(zip(SUMMARY_COLUMNS, row)) for row in rows]}
+
+    def get(self, run_id: str) -> Optional[Dict]:
+        """Everything stored for a run except chart bytes, which are listed by name"""
+        with self._lock:
+            cursor = self._conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            names = [name for name, in self._conn.execute(
+                "SELECT name FROM artifacts WHERE run_id = ? ORDER BY name", (run_id,))]
+        run = dict(zip((column[0] for column in cursor.description), row))
+        del run["product_key"]
+        for column in ("outputs", "dialogues", "metrics", "metric_bands", "timings", "profile", "schedule"):
+            run[column] = json.loads(run[column])
+        run["artifacts"] = names
+        return run
+
+    def artifact(self, run_id: str, name: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM artifacts WHERE run_id = ? AND name = ?",
+                                     (run_id, name)).fetchone()
+        return row[0] if row else None
+
+    def compare(self, run_ids: Iterable[str]) -> Dict:
+        """Side-by-side view of stored runs: day-30 projections, final outputs and cost"""
+        runs = {}
+        for run_id in run_ids:
+            run = self.get(run_id)
+            if run is None:
+                raise KeyError(run_id)
+            last = list(run["outputs"])[-1] if run["outputs"] else None
+            runs[run_id] = {
+                **{column: run[column] for column in SUMMARY_COLUMNS if column != "id"},
+                "day_30": {metric: {p: values[-1] for p, values in band.items()}
+                           for metric, band in run["metric_bands"].items()},
+                "final_outputs": run["outputs"].get(last, {}) if last else {},
+            }
+        return {"runs": runs}
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, default=str, ensure_ascii=False)
+
+
+_default_history = None
+_default_history_lock = threading.Lock()
+
+
+def get_history() -> RunHistory:
+    """Process-wide run history shared by every simulation"""
+    global _default_history
+    with _default_history_lock:
+        if _default_history is None:
+            _default_history = RunHistory()
+        return _default_history
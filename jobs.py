@@ -0,0 +1,110 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+from sim import StartupSimulation
+from history import RunHistory
+from agents.client import run_in_background_loop
+from events import EventLog, make_event
+
+
+class JobQueueFull(Exception):
+    """Raised when the number of queued jobs reaches the configured limit"""
+
+
+class Job:
+    """A single simulation request and its lifecycle"""
+
+    def __init__(self, product: str, stream_tokens: bool = False):
+        self.id = uuid.uuid4().hex
+        self.product = product
+        self.stream_tokens = stream_tokens
+        self.status = "queued"
+        self.result: Optional[Dict] = None
+        # Rendered images by file name, served from /artifacts/{id}/{name}
+        self.artifacts: Dict[str, bytes] = {}
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        # Progress events, followed by the SSE endpoint while the job runs
+        self.events = EventLog()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "product": self.product,
+            "status": self.status,
+            "result": self.result,
+            "artifact_urls": {role: f"/artifacts/{self.id}/{name}"
+                              for role, name in (self.result or {}).get("artifacts", {}).items()},
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+
+class JobManager:
+    """Runs simulations on a bounded thread pool so the event loop stays free"""
+
+    def __init__(self, max_workers: int = 4, max_queued: int = 100, max_retained: int = 200,
+                 visualize: bool = True, history: Optional[RunHistory] = None):
+        self.max_queued = max_queued
+        # False runs every job headless, without charts
+        self.visualize = visualize
+        # Completed jobs are stored here under their job ID, so they outlive max_retained
+        self.history = history
+        # Finished jobs hold their images in memory, so only the most recent are kept
+        self.max_retained = max_retained
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sim-worker")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, product: str, stream_tokens: bool = False) -> Job:
+        with self._lock:
+            queued = sum(1 for job in self._jobs.values() if job.status == "queued")
+            if queued >= self.max_queued:
+                raise JobQueueFull(f"{queued} simulations already queued")
+            job = Job(product, stream_tokens)
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _prune(self):
+        """Forget the oldest finished jobs once more than max_retained are tracked"""
+        excess = len(self._jobs) - self.max_retained
+        for job_id in [job.id for job in self._jobs.values() if job.done][:max(excess, 0)]:
+            del self._jobs[job_id]
+
+    def _run(self, job: Job):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            simulation = StartupSimulation(job.product, output_dir=None, event_sink=job.events,
+                                           stream_tokens=job.stream_tokens, visualize=self.visualize,
+                                           history=self.history, run_id=job.id)
+            job.result = run_in_background_loop(simulation.arun())
+            job.artifacts = simulation.artifacts
+            job.status = "completed"
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            job.events(make_event("job_end", status=job.status, error=job.error))
+            job.events.close()
@@ -0,0 +1,200 @@
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Sequence
+
+# Entry of a saved .npz holding the store's first day rather than a metric
+FIRST_DAY_KEY = "__first_day__"
+
+
+class MetricsStore:
+    """Day-indexed metric columns backed by NumPy arrays.
+
+    Each metric is a float64 array of shape (runs, days); day d lives at index
+    d - first_day and missing points are NaN. The arrays grow with spare capacity
+    past the last day; only the days in use are exposed. Slicing returns views
+    over the same buffers that keep their day numbers, and stores from many
+    simulations can be stacked along the run axis.
+    """
+
+    def __init__(self, columns: Sequence[str], days: int = 30, runs: int = 1):
+        self.columns = list(columns)
+        self._data = {column: np.full((runs, days), np.nan) for column in self.columns}
+        # Number of days in use; the arrays may be longer
+        self._length = days
+        # Day number of index 0; a slice starting at day 10 has first_day 10
+        self.first_day = 1
+        # Columns whose buffers are shared with a fork; they are copied before the next write
+        self._shared = set()
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], first_day: int = 1) -> "MetricsStore":
+        """Wrap existing (runs, days) or (days,) arrays without copying float64 input"""
+        store = cls.__new__(cls)
+        store.columns = list(arrays)
+        store._data = {column: np.atleast_2d(np.asarray(values, dtype=np.float64))
+                       for column, values in arrays.items()}
+        store._length = store._capacity
+        store.first_day = first_day
+        store._shared = set()
+        return store
+
+    @classmethod
+    def concat(cls, stores: Iterable["MetricsStore"]) -> "MetricsStore":
+        """Stack the runs of several stores with the same columns and day range"""
+        stores = list(stores)
+        columns = stores[0].columns
+        return cls.from_arrays({column: np.concatenate([store._arrays()[column] for store in stores])
+                                for column in columns}, first_day=stores[0].first_day)
+
+    @property
+    def runs(self) -> int:
+        return next(iter(self._data.values())).shape[0] if self._data else 0
+
+    @property
+    def days(self) -> np.ndarray:
+        """Day numbers covered by the store"""
+        return np.arange(self.first_day, self.first_day + self._length)
+
+    @property
+    def _capacity(self) -> int:
+        return next(iter(self._data.values())).shape[1] if self._data else 0
+
+    def _arrays(self) -> Dict[str, np.ndarray]:
+        """Every column trimmed to the days in use"""
+        return {column: values[:, :self._length] for column, values in self._data.items()}
+
+    def fork(self) -> "MetricsStore":
+        """Copy-on-write clone: buffers are shared until either store writes to a column"""
+        store = MetricsStore.__new__(MetricsStore)
+        store.columns = list(self.columns)
+        store._data = dict(self._data)
+        store._length = self._length
+        store.first_day = self.first_day
+        self._shared.update(self._data)
+        store._shared = set(self._data)
+        return store
+
+    def _writable(self, metric: str) -> np.ndarray:
+        if metric in self._shared:
+            self._data[metric] = self._data[metric].copy()
+            self._shared.discard(metric)
+        return self._data[metric]
+
+    def _ensure_days(self, day: int):
+        needed = day - self.first_day + 1
+        if needed <= self._length:
+            return
+        capacity = self._capacity
+        if needed > capacity:
+            # Double the capacity so appending day by day doesn't copy on every day
+            new_capacity = max(needed, capacity * 2)
+            for column, values in self._data.items():
+                grown = np.full((values.shape[0], new_capacity), np.nan)
+                grown[:, :self._length] = values[:, :self._length]
+                self._data[column] = grown
+            self._shared.clear()
+        self._length = needed
+
+    def append(self, metric: str, day: int, value: float, run: int = 0):
+        """Record a metric value for a day, growing the day axis if needed"""
+        if metric not in self._data:
+            self.columns.append(metric)
+            self._data[metric] = np.full((self.runs or 1, max(self._capacity, self._length)), np.nan)
+        if day < self.first_day:
+            raise IndexError(f"Day {day} is before the store's first day {self.first_day}")
+        self._ensure_days(day)
+        self._writable(metric)[run, day - self.first_day] = value
+
+    def set_series(self, metric: str, values: Sequence[float], run: int = 0):
+        """Replace a whole day series, starting from the store's first day"""
+        self._ensure_days(self.first_day + len(values) - 1)
+        self._writable(metric)[run, :len(values)] = values
+
+    def __getitem__(self, metric: str) -> np.ndarray:
+        """Series of a single-run store, or the (runs, days) array otherwise"""
+        values = self._data[metric][:, :self._length]
+        return values[0] if values.shape[0] == 1 else values
+
+    def __contains__(self, metric: str) -> bool:
+        return metric in self._data
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __len__(self):
+        return len(self.columns)
+
+    def items(self):
+        return ((column, self[column]) for column in self.columns)
+
+    def slice(self, start_day: int = 1, end_day: Optional[int] = None) -> "MetricsStore":
+        """View over days start_day..end_day inclusive; shares memory with this store"""
+        start = max(start_day - self.first_day, 0)
+        end = None if end_day is None else max(end_day - self.first_day + 1, start)
+        store = MetricsStore.__new__(MetricsStore)
+        store.columns = list(self.columns)
+        store._data = {column: values[:, start:end] for column, values in self._arrays().items()}
+        store._length = store._capacity
+        store.first_day = self.first_day + start
+        # Columns this store shares with a fork are shared by the view too; writing to one copies it first
+        store._shared = set(self._shared)
+        return store
+
+    def aggregate(self, fn=np.nanmean) -> Dict[str, np.ndarray]:
+        """Reduce each metric across runs to a per-day series"""
+        return {column: fn(values, axis=0) for column, values in self._arrays().items()}
+
+    def percentiles(self, percentiles: Sequence[int] = (5, 25, 50, 75, 95)) -> Dict[str, Dict[int, np.ndarray]]:
+        bands = {}
+        for column, values in self._arrays().items():
+            stacked = np.nanpercentile(values, percentiles, axis=0)
+            bands[column] = {p: stacked[i] for i, p in enumerate(percentiles)}
+        return bands
+
+    def to_dict(self) -> Dict[str, List]:
+        """JSON-friendly form; NaN becomes None"""
+        out = {"days": self.days.tolist()}
+        for column, values in self.items():
+            out[column] = np.where(np.isnan(values), None, values).tolist()
+        return out
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, List]) -> "MetricsStore":
+        """Inverse of to_dict"""
+        days = data.get("days")
+        return cls.from_arrays({column: np.array(values, dtype=np.float64)
+                                for column, values in data.items() if column != "days"},
+                               first_day=int(days[0]) if days else 1)
+
+    def to_npz(self, path: str, compressed: bool = True):
+        save = np.savez_compressed if compressed else np.savez
+        # Stores starting at day 1 are saved as plain metric arrays
+        extra = {FIRST_DAY_KEY: np.array(self.first_day)} if self.first_day != 1 else {}
+        save(path, **self._arrays(), **extra)
+
+    @classmethod
+    def from_npz(cls, path: str) -> "MetricsStore":
+        with np.load(path) as npz:
+            first_day = int(npz[FIRST_DAY_KEY]) if FIRST_DAY_KEY in npz.files else 1
+            return cls.from_arrays({column: npz[column] for column in npz.files if column != FIRST_DAY_KEY},
+                                   first_day=first_day)
+
+    def to_arrow(self):
+        """Long-by-run Arrow table (run, day, one column per metric); metric buffers are not copied"""
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError("Arrow export requires pyarrow: pip install pyarrow") from e
+        runs, days = self.runs, len(self.days)
+        columns = {
+            "run": pa.array(np.repeat(np.arange(runs, dtype=np.int32), days)),
+            "day": pa.array(np.tile(self.days.astype(np.int32), runs)),
+        }
+        for column, values in self._arrays().items():
+            # ravel() of a C-contiguous array is a view, which pyarrow wraps in place
+            columns[column] = pa.array(np.ascontiguousarray(values).ravel())
+        return pa.table(columns)
+
+    def to_parquet(self, path: str):
+        table = self.to_arrow()
+        import pyarrow.parquet as pq
+        pq.write_table(table, path)
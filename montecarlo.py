@@ -0,0 +1,145 @@
+import re
+
+import numpy as np
+from typing import Dict, Iterable, Optional
+
+METRICS = ['User Signups', 'Conversion Rate', 'Development Velocity', 'Customer Satisfaction']
+DAYS = 30
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Last day of each phase, matching MILESTONES in sim.py
+PHASE_ENDS = {"research": 5, "mvp": 15, "testing": 25, "launch": 30}
+
+DEFAULT_PARAMS = {
+    # Mean story points per day in each phase
+    "velocity": {"research": 7.0, "mvp": 9.0, "testing": 6.0, "launch": 5.0},
+    # Run-to-run spread of the team's velocity (lognormal sigma) and day-to-day noise
+    "velocity_sigma": 0.15,
+    "velocity_noise": 1.0,
+    # Expected new signups per day in each phase, scaled by a per-run market demand factor
+    "signup_rate": {"research": 0.0, "mvp": 0.5, "testing": 2.0, "launch": 4.0},
+    "demand_sigma": 0.5,
+    # Beta(a, b) prior over the signup-to-customer conversion rate once users arrive
+    "conversion_prior": (6.0, 18.0),
+    # Beta(a, b) prior over product quality, which drives satisfaction
+    "quality_prior": (8.0, 3.0),
+    "satisfaction_noise": 0.05,
+}
+
+# How the CEO's development approach shifts the model
+STRATEGY_ADJUSTMENTS = {
+    "Focus on quick MVP": {"velocity_scale": 1.2, "quality_shift": -0.05, "signup_scale": 1.15},
+    "Build robust architecture": {"velocity_scale": 0.85, "quality_shift": 0.08, "signup_scale": 0.9,
+                                  "conversion_shift": 0.02},
+    "Outsource development": {"velocity_scale": 1.05, "velocity_sigma": 0.3, "quality_shift": -0.03},
+}
+
+
+# "Decision: <option>" line that decision prompts ask the CEO to open with
+_DECISION_LINE = re.compile(r"^[\s*#>_-]*decision\s*[:-]\s*(.+)$", re.IGNORECASE | re.MULTILINE)
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _option_match(text: str, option: str) -> float:
+    """Share of an option's words (ignoring short ones like "on") that start a word of text"""
+    words = _WORD.findall(text.lower())
+    option_words = [word for word in _WORD.findall(option.lower()) if len(word) > 2]
+    if not option_words:
+        return 0.0
+    return sum(any(word.startswith(o) for word in words) for o in option_words) / len(option_words)
+
+
+def strategy_from_decision(decision: str, options: Iterable[str]) -> Optional[str]:
+    """The option a decision settles on, or None when it can't be told.
+
+    The "Decision: <option>" line is used when present, otherwise the whole
+    text. Paraphrases count ("a quick MVP" picks "Focus on quick MVP"), but an
+    option must match better than every other: free text weighing several
+    options without saying which one wins is ambiguous.
+    """
+    line = _DECISION_LINE.search(decision)
+    text = line.group(1) if line else decision
+    scores = {option: _option_match(text, option) for option in options}
+    best = max(scores.values(), default=0.0)
+    chosen = [option for option, score in scores.items() if score == best]
+    if best < 0.5 or len(chosen) > 1:
+        return None
+    return chosen[0]
+
+
+def model_params(strategy: Optional[str] = None) -> Dict:
+    """Model parameters adjusted for the chosen development strategy"""
+    params = {key: dict(value) if isinstance(value, dict) else value for key, value in DEFAULT_PARAMS.items()}
+    adjustments = STRATEGY_ADJUSTMENTS.get(strategy, {})
+    params["velocity"] = {phase: v * adjustments.get("velocity_scale", 1.0) for phase, v in params["velocity"].items()}
+    params["signup_rate"] = {phase: r * adjustments.get("signup_scale", 1.0)
+                             for phase, r in params["signup_rate"].items()}
+    params["velocity_sigma"] = adjustments.get("velocity_sigma", params["velocity_sigma"])
+    params["quality_shift"] = adjustments.get("quality_shift", 0.0)
+    params["conversion_shift"] = adjustments.get("conversion_shift", 0.0)
+    return params
+
+
+def _phase_values(values: Dict[str, float], days: int) -> np.ndarray:
+    """Expand per-phase values into a per-day vector"""
+    out = np.empty(days, dtype=np.float32)
+    start = 0
+    for phase in ("research", "mvp", "testing", "launch"):
+        end = min(PHASE_ENDS[phase], days)
+        out[start:end] = values[phase]
+        start = end
+    return out
+
+
+def simulate_trajectories(n_runs: int = 100_000, days: int = DAYS, params: Optional[Dict] = None,
+                          seed: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """Simulate every metric for every day across n_runs in one vectorized pass.
+
+    Returns one (n_runs, days) float32 array per metric.
+    """
+    params = params or model_params()
+    rng = np.random.default_rng(seed)
+    day = np.arange(1, days + 1)
+
+    # Development velocity: per-run team speed times phase mean, plus daily noise
+    team = rng.lognormal(0.0, params["velocity_sigma"], size=(n_runs, 1)).astype(np.float32)
+    velocity = team * _phase_values(params["velocity"], days)
+    velocity += rng.normal(0.0, params["velocity_noise"], size=(n_runs, days)).astype(np.float32)
+    np.maximum(velocity, 0.0, out=velocity)
+
+    # Signups: cumulative Poisson arrivals scaled by per-run market demand
+    demand = rng.lognormal(0.0, params["demand_sigma"], size=(n_runs, 1))
+    daily_signups = rng.poisson(demand * _phase_values(params["signup_rate"], days))
+    signups = np.cumsum(daily_signups, axis=1, dtype=np.float32)
+
+    # Conversion: per-run rate, realised as the paying share of accumulated signups
+    a, b = params["conversion_prior"]
+    rate = np.clip(rng.beta(a, b, size=(n_runs, 1)) + params["conversion_shift"], 0.0, 1.0)
+    customers = np.cumsum(rng.binomial(daily_signups, rate), axis=1, dtype=np.float32)
+    conversion = np.divide(customers, signups, out=np.zeros_like(signups), where=signups > 0)
+
+    # Satisfaction: product quality with daily noise, only measurable once users exist
+    a, b = params["quality_prior"]
+    quality = np.clip(rng.beta(a, b, size=(n_runs, 1)) + params["quality_shift"], 0.0, 1.0).astype(np.float32)
+    satisfaction = quality + rng.normal(0.0, params["satisfaction_noise"], size=(n_runs, days)).astype(np.float32)
+    np.clip(satisfaction, 0.0, 1.0, out=satisfaction)
+    satisfaction[:, day <= PHASE_ENDS["mvp"]] = 0.0
+
+    return {
+        'User Signups': signups,
+        'Conversion Rate': conversion,
+        'Development Velocity': velocity,
+        'Customer Satisfaction': satisfaction,
+    }
+
+
+def percentile_bands(trajectories: Dict[str, np.ndarray],
+                     percentiles: Iterable[int] = PERCENTILES) -> Dict[str, Dict[int, np.ndarray]]:
+    """Per-day percentiles of each metric across runs"""
+    percentiles = list(percentiles)
+    bands = {}
+    for metric, values in trajectories.items():
+        stacked = np.percentile(values, percentiles, axis=0)
+        bands[metric] = {p: stacked[i] for i, p in enumerate(percentiles)}
+    return bands
+
@@ -0,0 +1,219 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+# A task function receives the simulation and its dependencies' results as keyword arguments
+TaskFn = Callable[..., Awaitable[Any]]
+
+
+class Task:
+    """One agent step within a milestone, with the tasks whose results it consumes"""
+
+    def __init__(self, name: str, fn: TaskFn, milestone: str, deps: Sequence[str] = (),
+                 output: Optional[str] = None, store: bool = True, after: Sequence[str] = ()):
+        self.name = name
+        self.fn = fn
+        self.milestone = milestone
+        self.deps = tuple(deps)
+        # Tasks that must finish first although their results aren't passed in
+        self.after = tuple(after)
+        # Key of the result in the milestone's outputs; store=False keeps it internal
+        self.output = output or name
+        self.store = store
+
+    @property
+    def requires(self) -> Tuple[str, ...]:
+        return self.deps + self.after
+
+
+class MilestonePlan:
+    """Milestones and their tasks as a DAG; tasks depend on each other by name, across milestones.
+
+    deps are passed to the task function as keyword arguments; after only orders
+    the task behind the named ones.
+
+    Extend a copy of the default plan to add milestones or tasks without editing sim.py:
+
+        plan = default_plan()
+        plan.add_milestone("Day 31-40", "Fundraising")
+
+        @plan.task("Fundraising", deps=["decision"])
+        async def pitch(sim, decision):
+            return await sim.ceo.athink(f"Write an investor pitch given: {decision}")
+    """
+
+    def __init__(self):
+        self.milestones: List[Tuple[str, str]] = []
+        self.tasks: Dict[str, Task] = {}
+
+    def add_milestone(self, period: str, milestone: str):
+        if any(name == milestone for _, name in self.milestones):
+            raise ValueError(f"Milestone {milestone!r} already exists")
+        self.milestones.append((period, milestone))
+
+    def add_task(self, milestone: str, name: str, fn: TaskFn, deps: Sequence[str] = (),
+                 output: Optional[str] = None, store: bool = True, after: Sequence[str] = ()) -> Task:
+        if milestone not in self.milestone_names:
+            raise ValueError(f"Unknown milestone {milestone!r}")
+        if name in self.tasks:
+            raise ValueError(f"Task {name!r} already exists")
+        task = Task(name, fn, milestone, deps, output, store, after)
+        self.tasks[name] = task
+        return task
+
+    def task(self, milestone: str, deps: Sequence[str] = (), name: Optional[str] = None,
+             output: Optional[str] = None, store: bool = True,
+             after: Sequence[str] = ()) -> Callable[[TaskFn], TaskFn]:
+        """Decorator form of add_task; the task is named after the function by default"""
+        def register(fn: TaskFn) -> TaskFn:
+            self.add_task(milestone, name or fn.__name__, fn, deps, output, store, after)
+            return fn
+        return register
+
+    def remove_task(self, name: str):
+        dependents = [task.name for task in self.tasks.values() if name in task.requires]
+        if dependents:
+            raise ValueError(f"Task {name!r} is needed by {', '.join(dependents)}")
+        del self.tasks[name]
+
+    @property
+    def milestone_names(self) -> List[str]:
+        return [name for _, name in self.milestones]
+
+    def copy(self) -> "MilestonePlan":
+        plan = MilestonePlan()
+        plan.milestones = list(self.milestones)
+        plan.tasks = dict(self.tasks)
+        return plan
+
+    def order(self) -> List[Task]:
+        """Tasks in a dependency-respecting order, otherwise by milestone then declaration order"""
+        rank = {name: i for i, name in enumerate(self.milestone_names)}
+        remaining = sorted(self.tasks.values(), key=lambda task: rank[task.milestone])
+        for task in remaining:
+            missing = [dep for dep in task.requires if dep not in self.tasks]
+            if missing:
+                raise ValueError(f"Task {task.name!r} depends on unknown task(s) {', '.join(missing)}")
+        ordered: List[Task] = []
+        done = set()
+        while remaining:
+            ready = next((task for task in remaining if done.issuperset(task.requires)), None)
+            if ready is None:
+                raise ValueError(f"Dependency cycle among {', '.join(task.name for task in remaining)}")
+            remaining.remove(ready)
+            ordered.append(ready)
+            done.add(ready.name)
+        return ordered
+
+
+class Scheduler:
+    """Runs a plan's tasks as soon as their dependencies finish.
+
+    Milestones keep their order: a task starts only once every task of the
+    earlier milestones has finished, and only its dependencies order it within
+    its own milestone. overlap_milestones=True drops that barrier, so tasks start
+    as soon as their own dependencies finish, whatever milestone they belong to.
+    With parallel=False tasks run one at a time in plan order, reproducing a
+    sequential run. Start and end times are kept so the critical path (the
+    chain of tasks that held each other up, with the longest total duration)
+    can be reported. Results of tasks that already ran are passed as done and
+    are not rerun; until stops after the tasks of that milestone and the ones
+    before it.
+    """
+
+    def __init__(self, plan: MilestonePlan, parallel: bool = True, done: Optional[Dict[str, Any]] = None,
+                 until: Optional[str] = None, overlap_milestones: bool = False):
+        self.plan = plan
+        self.parallel = parallel
+        self.done = dict(done or {})
+        self.order = [task for task in plan.order() if task.name not in self.done]
+        rank = {name: i for i, name in enumerate(plan.milestone_names)}
+        if until is not None:
+            if until not in plan.milestone_names:
+                raise ValueError(f"Unknown milestone {until!r}")
+            self.order = [task for task in self.order if rank[task.milestone] <= rank[until]]
+            selected = {task.name for task in self.order}
+            for task in self.order:
+                later = [dep for dep in task.requires if dep not in selected and dep not in self.done]
+                if later:
+                    raise ValueError(f"Task {task.name!r} depends on {', '.join(later)}, "
+                                     f"which runs after {until!r}")
+        # Everything a task waits for: its own dependencies, plus the earlier milestones' tasks
+        self.waits_for: Dict[str, Tuple[str, ...]] = {}
+        for task in self.order:
+            earlier = () if overlap_milestones else tuple(
+                other.name for other in self.order if rank[other.milestone] < rank[task.milestone])
+            if not overlap_milestones:
+                later = [dep for dep in task.requires if rank[plan.tasks[dep].milestone] > rank[task.milestone]]
+                if later:
+                    raise ValueError(f"Task {task.name!r} depends on {', '.join(later)} from a later milestone; "
+                                     "pass overlap_milestones=True to allow it")
+            self.waits_for[task.name] = tuple(dict.fromkeys(task.requires + earlier))
+        self.started_at: Optional[float] = None
+        self.spans: Dict[str, Tuple[float, float]] = {}
+
+    async def _timed(self, task: Task, execute: Callable[[Task, Dict[str, Any]], Awaitable[Any]],
+                     inputs: Dict[str, Any]) -> Any:
+        start = time.perf_counter()
+        result = await execute(task, inputs)
+        self.spans[task.name] = (start, time.perf_counter())
+        return result
+
+    async def run(self, execute: Callable[[Task, Dict[str, Any]], Awaitable[Any]]) -> Dict[str, Any]:
+        """Run every task through execute(task, inputs); returns results by task name"""
+        self.started_at = time.perf_counter()
+        results: Dict[str, Any] = dict(self.done)
+        waiting = list(self.order)
+        running: Dict[asyncio.Future, Task] = {}
+        try:
+            while waiting or running:
+                ready = [task for task in waiting if all(dep in results for dep in self.waits_for[task.name])]
+                if not self.parallel:
+                    ready = ready[:1] if not running else []
+                for task in ready:
+                    waiting.remove(task)
+                    inputs = {dep: results[dep] for dep in task.deps}
+                    running[asyncio.ensure_future(self._timed(task, execute, inputs))] = task
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    results[task.name] = future.result()
+        finally:
+            # A failed task stops the run; don't leave its siblings running in the background
+            for future in running:
+                future.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+        return results
+
+    def critical_path(self) -> Tuple[List[str], float]:
+        """Longest chain of tasks that waited on each other, by measured duration, and its total seconds"""
+        length: Dict[str, float] = {}
+        previous: Dict[str, Optional[str]] = {}
+        for task in self.order:
+            start, end = self.spans.get(task.name, (0.0, 0.0))
+            slowest = max((dep for dep in self.waits_for[task.name] if dep in length),
+                          key=lambda dep: length[dep], default=None)
+            previous[task.name] = slowest
+            length[task.name] = (end - start) + (length[slowest] if slowest else 0.0)
+        if not length:
+            return [], 0.0
+        name: Optional[str] = max(length, key=length.get)
+        total = length[name]
+        path = []
+        while name is not None:
+            path.append(name)
+            name = previous[name]
+        return path[::-1], total
+
+    def report(self) -> Dict:
+        """Per-task timing relative to the start of the run, plus the critical path"""
+        path, seconds = self.critical_path()
+        tasks = {}
+        for task in self.order:
+            if task.name not in self.spans:
+                continue
+            start, end = self.spans[task.name]
+            tasks[task.name] = {"milestone": task.milestone, "deps": list(task.requires),
+                                "start": start - self.started_at, "duration": end - start}
+        return {"tasks": tasks, "critical_path": path, "critical_path_seconds": seconds}
@@ -1,11 +1,25 @@
 import os
+import asyncio
+import copy
+import contextvars
+import random
+import re
+import time
+import uuid
+from typing import Optional
 from dotenv import load_dotenv
-from anthropic import Anthropic, DefaultHttpxClient
 from agents.ceo import CEOAgent
 from agents.developer import DeveloperAgent
 from agents.marketer import MarketerAgent
-from viz import SimulationVisualizer
-import numpy as np
+from agents.cache import get_default_cache
+from agents.client import get_async_client, get_client, get_rate_limiter
+from agents.transcript import Transcript
+from events import ConsoleSink, EventSink, make_event
+from montecarlo import METRICS, model_params, percentile_bands, simulate_trajectories, strategy_from_decision
+from metrics_store import MetricsStore
+from telemetry import RunProfile, observe_call, observe_milestone
+from scheduler import MilestonePlan, Scheduler, Task
+from history import RunHistory, get_history
 load_dotenv()
 
 MILESTONES = [
@@ -15,189 +29,594 @@ MILESTONES = [
     ("Day 26-30", "Launch & analytics")
 ]
 
+# Team structure; static, so its rendered graph can be cached
+AGENT_INFO = {
+    'ceo': {
+        'name': 'CEO', 
+        'role': 'Chief Executive Officer',
+        'relations': [
+            {'to': 'dev', 'type': 'directs'},
+            {'to': 'mkt', 'type': 'directs'}
+        ]
+    },
+    'dev': {
+        'name': 'Developer', 
+        'role': 'Technical Lead',
+        'relations': [
+            {'to': 'mkt', 'type': 'collaborates'}
+        ]
+    },
+    'mkt': {
+        'name': 'Marketer', 
+        'role': 'Marketing Lead',
+        'relations': [
+            {'to': 'ceo', 'type': 'reports to'}
+        ]
+    }
+}
+
+DEVELOPMENT_OPTIONS = ["Focus on quick MVP", "Build robust architecture", "Outsource development"]
+
+# Sample size of the Monte Carlo metrics projection
+MONTE_CARLO_RUNS = int(os.getenv("SIM_MONTE_CARLO_RUNS", "100000"))
+
+# Milestone being executed; a context variable so concurrent calls and worker threads inherit it
+_current_milestone: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("milestone", default=None)
+
+# Built-in tasks. Each takes the simulation plus the results of the tasks it depends on.
+
+async def _market_analysis(sim):
+    sim._log("🔍 Conducting market research...")
+    market_analysis = await sim.marketer.aanalyze_market(sim.product)
+    sim._log(f"📊 Market size: {market_analysis['market_size']}")
+    sim._log(f"🏢 Competitors: {market_analysis['competitors']}")
+    sim._log(f"🎯 Positioning: {market_analysis['positioning']}")
+    return market_analysis
+
+async def _tech_stack(sim, market_analysis):
+    sim._log("\n💻 Evaluating technology options...")
+    tech_requirements = {
+        "product": sim.product,
+        "market_size": market_analysis['market_size'],
+        "time_constraint": "4 weeks"
+    }
+    tech_stack = await sim.developer.aevaluate_tech_stack(tech_requirements)
+    sim._log(f"🛠️ Recommended tech stack: {tech_stack}")
+    return tech_stack
+
+async def _strategy(sim):
+    sim._log("\n🧠 CEO making strategic decisions...")
+    strategy = await sim.ceo.amake_strategic_decision("Development approach", DEVELOPMENT_OPTIONS)
+    sim._log(f"📝 Strategic plan: {strategy}")
+    return strategy
+
+async def _approach(sim, strategy):
+    # The development option the CEO's decision (or a fork's override) settles on; None if unclear
+    approach = strategy_from_decision(strategy, DEVELOPMENT_OPTIONS)
+    if approach is None:
+        sim._log("⚠️ The CEO's decision doesn't name one development option; projecting with baseline parameters")
+    return approach
+
+async def _tech_dialogue(sim):
+    # CAMEL-based dialogue between CEO and Developer
+    sim._log("\n🗣️ CEO and Developer discussing tech approach...")
+    sim.ceo.developer = sim.developer
+    return await sim.ceo.abrainstorm_with_developer(sim.product)
+
+async def _effort_estimates(sim, approach):
+    sim._log("📋 Planning MVP features...")
+    features = [
+        f"Core {sim.product} functionality", 
+        "User authentication",
+        "Basic analytics", 
+        "Payment processing"
+    ]
+    
+    sim._log("⏱️ Estimating development effort...")
+    effort_estimates = await sim.developer.aestimate_efforts(features, approach)
+    for feature, effort in effort_estimates.items():
+        sim._log(f"  - {feature}: {effort['time']} (Complexity: {effort['complexity']})")
+    
+    sim._log("\n🔨 Beginning development...")
+    sim._log("  Day 7: Setting up development environment")
+    sim._log("  Day 9: Basic application structure complete")
+    sim._log("  Day 12: Key features implemented")
+    sim._log("  Day 15: MVP ready for testing")
+    return effort_estimates
+
+async def _feedback(sim):
+    sim._log("👥 Recruiting test users...")
+    sim._log("📝 Collecting user feedback...")
+    
+    feedback = [
+        "Interface is confusing",
+        "Love the core functionality",
+        "Missing important feature X",
+        "Performance issues on mobile"
+    ]
+    
+    for i, item in enumerate(feedback, 1):
+        sim._log(f"  Feedback #{i}: {item}")
+    
+    sim._log("\n🛠️ Developer addressing critical issues...")
+    for issue in feedback[:2]: 
+        sim._log(f"  Fixing: {issue}")
+    
+    sim._log("\n📣 Marketer preparing launch campaign...")
+    sim._log("  - Creating landing page")
+    sim._log("  - Preparing email templates")
+    sim._log("  - Setting up analytics")
+    return feedback
+
+async def _launch_dialogue(sim, approach):
+    # CAMEL-based dialogue between CEO and Marketer
+    sim._log("\n🗣️ CEO and Marketer planning launch strategy...")
+    sim.ceo.marketer = sim.marketer
+    return await sim.ceo.aplan_with_marketer(_with_approach(sim.product, approach))
+
+async def _projection(sim, approach):
+    sim._log("🚀 Product launch day!")
+    projection = await asyncio.to_thread(sim._project_metrics, approach)
+    sim._log_projection(projection)
+    return projection
+
+async def _decision(sim, approach):
+    sim._log("\n👨‍💼 CEO evaluating launch success...")
+    options = ["Continue with current strategy", "Pivot to different market", "Seek additional funding"]
+    decision = await sim.ceo.amake_strategic_decision(_with_approach("Post-launch strategy", approach), options)
+    sim._log(f"🔮 Future direction: {decision}")
+    return decision
+
+def _with_approach(topic: str, approach) -> str:
+    return topic if approach is None else f"{topic} (development approach: {approach})"
+
+def default_plan() -> MilestonePlan:
+    """The built-in milestones and tasks; returns a fresh plan that callers may extend"""
+    plan = MilestonePlan()
+    for period, task in MILESTONES:
+        plan.add_milestone(period, task)
+    research, mvp, testing, launch = (task for _, task in MILESTONES)
+    plan.add_task(research, "market_analysis", _market_analysis)
+    plan.add_task(research, "tech_stack", _tech_stack, deps=["market_analysis"])
+    plan.add_task(research, "strategy", _strategy)
+    # Later steps are planned around the chosen option, so forks overriding the strategy play out differently
+    plan.add_task(research, "approach", _approach, deps=["strategy"], store=False)
+    plan.add_task(research, "tech_dialogue", _tech_dialogue, output="dialogue")
+    # The story's order holds even when milestones overlap: features are estimated on the chosen
+    # stack, the launch is planned after testing, and launch success is judged after the launch
+    plan.add_task(mvp, "effort_estimates", _effort_estimates, deps=["approach"], after=["tech_stack"])
+    plan.add_task(testing, "feedback", _feedback)
+    plan.add_task(testing, "launch_dialogue", _launch_dialogue, output="dialogue", deps=["approach"],
+                  after=["feedback"])
+    # The projection is parameterized by the development strategy chosen during research
+    plan.add_task(launch, "projection", _projection, deps=["approach"], store=False)
+    plan.add_task(launch, "decision", _decision, deps=["approach"], after=["projection", "launch_dialogue"])
+    return plan
+
 class StartupSimulation:
-    def __init__(self, product_idea: str):
+    def __init__(self, product_idea: str, max_concurrency: int = 4, use_cache: bool = True,
+                 output_dir: Optional[str] = ".", image_format: str = "png", event_sink: Optional[EventSink] = None, stream_tokens: bool = False,
+                 monte_carlo_runs: int = MONTE_CARLO_RUNS, seed: Optional[int] = None, batched_prompts: bool = False,
+                 visualize: bool = True, transcript: Optional[Transcript] = None,
+                 plan: Optional[MilestonePlan] = None, history: Optional[RunHistory] = None,
+                 run_id: Optional[str] = None, overlap_milestones: bool = False):
+        # A strict (replay) transcript answers every call, so no API key or client is needed
+        self.replaying = transcript is not None and transcript.strict
         api_key = os.getenv("ANTHROPIC_API_KEY")
-        if not api_key:
+        if not api_key and not self.replaying:
             raise ValueError("ANTHROPIC_API_KEY environment variable is not set")
             
-        self.client = Anthropic(
-            api_key=api_key,
-            http_client=DefaultHttpxClient()
-        )
+        # Shared across simulations so connections are pooled and rate limits apply process-wide
+        self.client = None if self.replaying else get_client()
+        
+        # use_cache=False bypasses the shared response cache for this run only
+        self.cache = get_default_cache() if use_cache else None
         
-        self.ceo = CEOAgent(self.client)
-        self.developer = DeveloperAgent(self.client)
-        self.marketer = MarketerAgent(self.client)
+        self.ceo = CEOAgent(self.client, cache=self.cache)
+        self.developer = DeveloperAgent(self.client, cache=self.cache)
+        self.marketer = MarketerAgent(self.client, cache=self.cache)
+        self.agents = [self.ceo, self.developer, self.marketer]
+        # Progress goes to the sink as structured events; the CLI default prints them
+        self.event_sink = event_sink if event_sink is not None else ConsoleSink()
+        for agent in self.agents:
+            agent.emit = self._emit
+            agent.stream_tokens = stream_tokens
+            agent.rate_limiter = get_rate_limiter()
+            # Multi-part queries (market facets, feature estimates) become one JSON call each
+            agent.batched = batched_prompts
+            agent.transcript = transcript
+        self.transcript = transcript
+        self.batched_prompts = batched_prompts
+        if transcript is not None and transcript.header is not None:
+            if transcript.header["product"] != product_idea:
+                raise ValueError(f"Transcript {transcript.path} is for a different product")
+            # The recorded seed and sample size reproduce the same metrics projection
+            seed = transcript.header["seed"]
+            monte_carlo_runs = transcript.header["monte_carlo_runs"]
+        elif transcript is not None and seed is None:
+            seed = random.SystemRandom().randrange(2 ** 32)
         self.product = product_idea
-        self.metrics = {
-            'User Signups': [],
-            'Conversion Rate': [],
-            'Development Velocity': [],
-            'Customer Satisfaction': []
-        }
-        self.agent_info = {
-            'ceo': {
-                'name': 'CEO', 
-                'role': 'Chief Executive Officer',
-                'relations': [
-                    {'to': 'dev', 'type': 'directs'},
-                    {'to': 'mkt', 'type': 'directs'}
-                ]
-            },
-            'dev': {
-                'name': 'Developer', 
-                'role': 'Technical Lead',
-                'relations': [
-                    {'to': 'mkt', 'type': 'collaborates'}
-                ]
-            },
-            'mkt': {
-                'name': 'Marketer', 
-                'role': 'Marketing Lead',
-                'relations': [
-                    {'to': 'ceo', 'type': 'reports to'}
-                ]
-            }
-        }
+        # Upper bound on LLM calls in flight at once during arun()
+        self.max_concurrency = max_concurrency
+        # Charts and graphs are written here as well as kept in memory; None keeps them in memory only
+        self.output_dir = output_dir
+        self.image_format = image_format
+        # visualize=False runs headless: no charts or graphs are rendered and viz is never imported
+        self.visualize = visualize
+        self.outputs = {}
+        # Rendered images by file name, and the file name of each chart
+        self.artifacts = {}
+        self.artifact_names = {}
+        # Wall-clock seconds per milestone, plus "total" for the whole run
+        self.timings = {}
+        self.monte_carlo_runs = monte_carlo_runs
+        self.seed = seed
+        self.strategy = None
+        # Per-day percentiles of each metric across Monte Carlo runs
+        self.metric_bands = {}
+        self.metrics = MetricsStore(METRICS)
+        self.agent_info = AGENT_INFO
+        # LLM call latency, tokens and retries rolled up per milestone and agent
+        self.profile = RunProfile()
+        # Milestones and tasks to run; task timings and the critical path land in schedule
+        self.plan = plan if plan is not None else default_plan()
+        # By default a milestone starts once the previous one has finished; True lets independent tasks run ahead
+        self.overlap_milestones = overlap_milestones
+        self.schedule = {}
+        # Results of finished tasks by name; a later run(), or a fork, continues from them
+        self._task_results = {}
+        self._started = False
+        # Name of this run when it is a branch created by fork(); tags its events
+        self.branch = None
+        # Task results forced by fork(overrides=...)
+        self.overrides = {}
+        # Finished runs are stored here under run_id; replays are not stored again
+        self.history = history
+        self.run_id = run_id or uuid.uuid4().hex
+        self.started_at = None
         
     
-    def _execute_milestone(self, period: str, task: str):
-        """Execute tasks for each milestone period"""
-        day_num = int(period.split('-')[-1])
-
-        if "Market research" in task:
-            print("🔍 Conducting market research...")
-            market_analysis = self.marketer.analyze_market(self.product)
-            print(f"📊 Market size: {market_analysis['market_size']}")
-            print(f"🏢 Competitors: {market_analysis['competitors']}")
-            print(f"🎯 Positioning: {market_analysis['positioning']}")
-            
-            print("\n💻 Evaluating technology options...")
-            tech_requirements = {
-                "product": self.product,
-                "market_size": market_analysis['market_size'],
-                "time_constraint": "4 weeks"
-            }
-            tech_stack = self.developer.evaluate_tech_stack(tech_requirements)
-            print(f"🛠️ Recommended tech stack: {tech_stack}")
-            
-            print("\n🧠 CEO making strategic decisions...")
-            options = ["Focus on quick MVP", "Build robust architecture", "Outsource development"]
-            strategy = self.ceo.make_strategic_decision("Development approach", options)
-            print(f"📝 Strategic plan: {strategy}")
-            
-            # Add CAMEL-based dialogue between CEO and Developer
-            print("\n🗣️ CEO and Developer discussing tech approach...")
-            # Set up references for dialogue
-            self.ceo.developer = self.developer
-            dialogue = self.ceo.brainstorm_with_developer(self.product)
-            
-        elif "MVP development" in task:
-            print("📋 Planning MVP features...")
-            features = [
-                f"Core {self.product} functionality", 
-                "User authentication",
-                "Basic analytics", 
-                "Payment processing"
-            ]
-            
-            print("⏱️ Estimating development effort...")
-            effort_estimates = {}
-            for feature in features:
-                effort = self.developer.estimate_effort(feature)
-                effort_estimates[feature] = effort
-                print(f"  - {feature}: {effort['time']} (Complexity: {effort['complexity']})")
-            
-            print("\n🔨 Beginning development...")
-            print("  Day 7: Setting up development environment")
-            print("  Day 9: Basic application structure complete")
-            print("  Day 12: Key features implemented")
-            print("  Day 15: MVP ready for testing")
-            
-        elif "User testing" in task:
-            print("👥 Recruiting test users...")
-            print("📝 Collecting user feedback...")
-            
-            feedback = [
-                "Interface is confusing",
-                "Love the core functionality",
-                "Missing important feature X",
-                "Performance issues on mobile"
-            ]
-            
-            for i, item in enumerate(feedback, 1):
-                print(f"  Feedback #{i}: {item}")
-            
-            print("\n🛠️ Developer addressing critical issues...")
-            for issue in feedback[:2]: 
-                print(f"  Fixing: {issue}")
-            
-            print("\n📣 Marketer preparing launch campaign...")
-            print("  - Creating landing page")
-            print("  - Preparing email templates")
-            print("  - Setting up analytics")
-            
-            # Add CAMEL-based dialogue between CEO and Marketer
-            print("\n🗣️ CEO and Marketer planning launch strategy...")
-            self.ceo.marketer = self.marketer
-            dialogue = self.ceo.plan_with_marketer(self.product)
-            
-        elif "Launch" in task:
-            print("🚀 Product launch day!")
-            print("📊 Initial metrics:")
-            print("  - 150 website visitors")
-            print("  - 45 signups")
-            print("  - 12 paying customers")
-            
-            print("\n📈 Marketer analyzing conversion rates...")
-            print("  - 30% visitor-to-signup conversion")
-            print("  - 26.7% signup-to-customer conversion")
-            
-            print("\n👨‍💼 CEO evaluating launch success...")
-            options = ["Continue with current strategy", "Pivot to different market", "Seek additional funding"]
-            decision = self.ceo.make_strategic_decision("Post-launch strategy", options)
-            print(f"🔮 Future direction: {decision}")
-
-        # Update metrics
-        if "Market research" in task:
-            self.metrics['User Signups'].append((f"Day {day_num}", 0))
-            self.metrics['Conversion Rate'].append((f"Day {day_num}", 0))
-            self.metrics['Development Velocity'].append((f"Day {day_num}", 7))  
-            self.metrics['Customer Satisfaction'].append((f"Day {day_num}", 0))
-            
-        elif "MVP development" in task:
-            self.metrics['User Signups'].append((f"Day {day_num}", 5))  
-            self.metrics['Development Velocity'].append((f"Day {day_num}", 9))
-            
-        elif "User testing" in task:
-            self.metrics['User Signups'].append((f"Day {day_num}", 25))
-            self.metrics['Conversion Rate'].append((f"Day {day_num}", 0.2))
-            self.metrics['Development Velocity'].append((f"Day {day_num}", 6))  
-            self.metrics['Customer Satisfaction'].append((f"Day {day_num}", 0.7))
-            
-        elif "Launch" in task:
-            self.metrics['User Signups'].append((f"Day {day_num}", 45))
-            self.metrics['Conversion Rate'].append((f"Day {day_num}", 0.27))
-            self.metrics['Development Velocity'].append((f"Day {day_num}", 5))
-            self.metrics['Customer Satisfaction'].append((f"Day {day_num}", 0.8))   
-    def run(self):
-        """Run the full startup simulation"""
-        for period, task in MILESTONES:
-            print(f"\n=== {period}: {task} ===")
-            self._execute_milestone(period, task)
+    def _emit(self, event_type: str, **fields):
+        if event_type.startswith("call_"):
+            fields.setdefault("milestone", _current_milestone.get())
+        if self.branch is not None:
+            fields.setdefault("branch", self.branch)
+        event = make_event(event_type, **fields)
+        if event_type == "call_end":
+            self.profile.add(event)
+            observe_call(event)
+        self.event_sink(event)
+
+    @classmethod
+    def replay(cls, path: str, **kwargs) -> "StartupSimulation":
+        """Rebuild a recorded run, charts included, from its transcript without any API calls"""
+        return cls._from_transcript(Transcript(path, strict=True), **kwargs)
+
+    @classmethod
+    def resume(cls, path: str, **kwargs) -> "StartupSimulation":
+        """Continue a recorded run: recorded calls are replayed, the rest are made live and appended"""
+        return cls._from_transcript(Transcript(path), **kwargs)
+
+    @classmethod
+    def _from_transcript(cls, transcript: Transcript, **kwargs) -> "StartupSimulation":
+        if transcript.header is None:
+            raise ValueError(f"{transcript.path} has no run header")
+        kwargs.setdefault("batched_prompts", transcript.header.get("batched_prompts", False))
+        return cls(transcript.header["product"], transcript=transcript, **kwargs)
+
+    def _begin_run(self):
+        self.started_at = time.time()
+        self._emit("run_start", product=self.product)
+        if self.transcript is None:
+            return
+        if self.transcript.header is None:
+            self.transcript.record("run", product=self.product, seed=self.seed,
+                                   monte_carlo_runs=self.monte_carlo_runs, batched_prompts=self.batched_prompts)
+        elif self.transcript.completed_milestones:
+            mode = "Replaying" if self.replaying else "Resuming"
+            self._log(f"⏪ {mode} from transcript: {len(self.transcript.completed_milestones)} milestone(s) "
+                      "already completed are replayed without API calls")
+
+    def _end_run(self):
+        if self.transcript is not None and not self.transcript.finished:
+            self.transcript.record("run_end", timings=self.timings)
+        self._emit("run_end", product=self.product)
+
+    def _record_history(self):
+        if self.history is not None and not self.replaying:
+            self.history.record(self.run_id, self.results(), self.artifacts, started_at=self.started_at,
+                                branch=self.branch)
+
+    def _record_milestone(self, period: str, task: str, start: float):
+        self.timings[task] = time.perf_counter() - start
+        observe_milestone(task, self.timings[task])
+        if self.transcript is not None and task not in self.transcript.completed_milestones:
+            self.transcript.record("milestone", period=period, task=task, outputs=self.outputs.get(task),
+                                   duration=self.timings[task])
+        self._emit("milestone_end", period=period, task=task, duration=self.timings[task])
+
+    def _log(self, message: str):
+        self._emit("log", message=message)
+
+    def _project_metrics(self, strategy: Optional[str]) -> dict:
+        """Monte Carlo projection of the daily metrics, parameterized by the CEO's development strategy"""
+        self.strategy = strategy
+        trajectories = simulate_trajectories(self.monte_carlo_runs, params=model_params(self.strategy), seed=self.seed)
+        # Only the per-day percentiles are kept; the raw runs are too large to hold onto
+        self.metric_bands = percentile_bands(trajectories)
+        del trajectories
+        for metric, band in self.metric_bands.items():
+            self.metrics.set_series(metric, band[50])
+        return {metric: {p: float(values[-1]) for p, values in band.items()}
+                for metric, band in self.metric_bands.items()}
+
+    def _log_projection(self, projection: dict):
+        self._log(f"📊 Projected day-30 metrics ({self.strategy or 'baseline'} strategy, "
+                  f"median and 90% interval over {self.monte_carlo_runs} runs):")
+        for metric, values in projection.items():
+            self._log(f"  - {metric}: {values[50]:.2f} ({values[5]:.2f} - {values[95]:.2f})")
+
+    async def _execute_task(self, task: Task, inputs: dict):
+        """Run one plan task, tracking when its milestone starts and finishes"""
+        if task.milestone not in self._milestone_starts:
+            self._milestone_starts[task.milestone] = time.perf_counter()
+            self._emit("milestone_start", period=self._periods[task.milestone], task=task.milestone)
+        self._emit("task_start", task=task.name, milestone=task.milestone)
+        start = time.perf_counter()
+        milestone = _current_milestone.set(task.milestone)
+        try:
+            result = await task.fn(self, **inputs)
+        finally:
+            _current_milestone.reset(milestone)
+        self._emit("task_end", task=task.name, milestone=task.milestone, duration=time.perf_counter() - start)
+        if task.store:
+            self.outputs.setdefault(task.milestone, {})[task.output] = result
+        self._pending_tasks[task.milestone] -= 1
+        if self._pending_tasks[task.milestone] == 0:
+            self._record_milestone(self._periods[task.milestone], task.milestone,
+                                   self._milestone_starts[task.milestone])
+        return result
+
+    async def _run_plan(self, parallel: bool, until: Optional[str] = None):
+        # A serial run also makes the calls within a task (market facets, feature estimates) one at a time
+        semaphore = asyncio.Semaphore(self.max_concurrency if parallel else 1)
+        async_client = None if self.replaying else get_async_client()
+        for agent in self.agents:
+            agent.semaphore = semaphore
+            agent.async_client = async_client
+        
+        scheduler = Scheduler(self.plan, parallel=parallel, done=self._task_results, until=until,
+                              overlap_milestones=self.overlap_milestones)
+        self._periods = dict((task, period) for period, task in self.plan.milestones)
+        self._milestone_starts = {}
+        self._pending_tasks = {task: 0 for _, task in self.plan.milestones}
+        for task in scheduler.order:
+            self._pending_tasks[task.milestone] += 1
+        # Keep outputs in milestone order however the tasks happen to finish
+        self.outputs = {milestone: self.outputs.get(milestone, {}) for milestone in self.plan.milestone_names
+                        if milestone in self.outputs
+                        or any(task.store and task.milestone == milestone for task in scheduler.order)}
+        
+        if not self._started:
+            self._begin_run()
+            self._started = True
+        run_start = time.perf_counter()
+        self._task_results = await scheduler.run(self._execute_task)
+        self.schedule = scheduler.report()
+        if len(self._task_results) < len(self.plan.tasks):
+            # Stopped early (until=...); a later run() or fork() picks up from here
+            self.timings["total"] = self.timings.get("total", 0.0) + time.perf_counter() - run_start
+            return self.results()
         
-        metrics_chart = SimulationVisualizer.plot_startup_metrics(self.metrics)
-        team_graph = SimulationVisualizer.create_agent_relationship_graph(self.agent_info)
+        # Rendering is blocking; keep it off the event loop shared with other runs
+        if self.visualize:
+            await asyncio.to_thread(self._visualize)
+        self.timings["total"] = self.timings.get("total", 0.0) + time.perf_counter() - run_start
+        # Serializing the run and writing it with its charts is blocking too
+        await asyncio.to_thread(self._record_history)
+        self._end_run()
+        return self.results()
+
+    def run(self, until: Optional[str] = None):
+        """Run the startup simulation from synchronous code, one task and one LLM call at a time.
+
+        until stops after that milestone; calling run() again continues where it stopped.
+        run() starts its own event loop, so from async code (or a notebook) await arun() instead.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self._run_plan(parallel=False, until=until))
+        raise RuntimeError("run() cannot be called from a running event loop; await arun() instead")
+
+    async def arun(self, until: Optional[str] = None):
+        """Run the startup simulation, starting each task as soon as the tasks it waits for finish.
+
+        At most max_concurrency LLM calls are in flight at once.
+        """
+        return await self._run_plan(parallel=True, until=until)
+
+    def fork(self, overrides: Optional[dict] = None, name: Optional[str] = None,
+             event_sink: Optional[EventSink] = None) -> "StartupSimulation":
+        """Branch the run at its current point; running the branch only executes the remaining tasks.
+
+        Agent memories, metrics and outputs are shared copy-on-write, so forking
+        is cheap and neither run sees the other's later changes. overrides
+        replaces task results by name (e.g. {"strategy": "Outsource development"});
+        finished tasks that depend on an overridden one are rerun in the branch.
+        Branches are not recorded to the transcript.
+        """
+        if self.replaying:
+            raise ValueError("A replayed run cannot be forked; resume it instead")
+        overrides = overrides or {}
+        unknown = [task for task in overrides if task not in self.plan.tasks]
+        if unknown:
+            raise ValueError(f"Unknown task(s) {', '.join(unknown)}")
         
-        print(f"\n📊 Simulation metrics saved to {metrics_chart}")
-        print(f"👥 Team dynamics graph saved to {team_graph}")
+        branch = copy.copy(self)
+        branch.branch = name
+        branch.run_id = uuid.uuid4().hex
+        branch.overrides = {**self.overrides, **overrides}
+        branch.event_sink = event_sink if event_sink is not None else self.event_sink
+        branch.transcript = None
+        agents = {id(agent): agent.fork() for agent in self.agents}
+        branch.agents = list(agents.values())
+        branch.ceo, branch.developer, branch.marketer = branch.agents
+        for agent in branch.agents:
+            agent.emit = branch._emit
+            agent.transcript = None
+            # Dialogue partners set on an agent point at the parent's agents; repoint them
+            for attr, value in list(vars(agent).items()):
+                if id(value) in agents:
+                    setattr(agent, attr, agents[id(value)])
+        branch.outputs = {milestone: dict(outputs) for milestone, outputs in self.outputs.items()}
+        branch.metrics = self.metrics.fork()
+        branch.timings = dict(self.timings)
+        branch.artifacts = {}
+        branch.artifact_names = {}
+        if self.output_dir is not None and name:
+            # Keep each branch's charts apart from the parent's and each other's
+            branch.output_dir = os.path.join(self.output_dir, "branches", re.sub(r"[^\w-]+", "-", name.lower()).strip("-"))
+        # Only the branch's own calls are counted, so its profile is the cost of the divergent suffix
+        branch.profile = RunProfile()
+        branch.schedule = {}
+        branch._started = False
+        branch._task_results = dict(self._task_results)
+        for task_name, value in overrides.items():
+            branch._override(task_name, value)
+        return branch
+
+    def _override(self, task_name: str, value):
+        task = self.plan.tasks[task_name]
+        stale = {task_name}
+        for dependent in self.plan.order():
+            if stale.intersection(dependent.deps):
+                stale.add(dependent.name)
+        for name in stale:
+            self._task_results.pop(name, None)
+        self._task_results[task_name] = value
+        if task.store:
+            self.outputs.setdefault(task.milestone, {})[task.output] = value
+
+    def _visualize(self):
+        """Render the metrics chart and team graph in memory, saving them when output_dir is set"""
+        from viz import SimulationVisualizer
+        fmt = self.image_format
+        self.artifact_names = {
+            "metrics_chart": f"startup_metrics.{fmt}",
+            "team_graph": f"agent_relationships.{fmt}"
+        }
+        self.artifacts = {
+            self.artifact_names["metrics_chart"]:
+                SimulationVisualizer.render_startup_metrics(self.metrics, self.metric_bands, fmt),
+            self.artifact_names["team_graph"]:
+                SimulationVisualizer.render_agent_relationship_graph(self.agent_info, fmt)
+        }
+        if self.output_dir is None:
+            return
+        
+        os.makedirs(self.output_dir, exist_ok=True)
+        for name, data in self.artifacts.items():
+            with open(os.path.join(self.output_dir, name), "wb") as f:
+                f.write(data)
+        
+        self._log(f"\n📊 Simulation metrics saved to {os.path.join(self.output_dir, self.artifact_names['metrics_chart'])}")
+        self._log(f"👥 Team dynamics graph saved to {os.path.join(self.output_dir, self.artifact_names['team_graph'])}")
+
+    def results(self) -> dict:
+        """Agent outputs, metrics, timings and artifact paths of the run"""
+        return {
+            "product": self.product,
+            "outputs": self.outputs,
+            "metrics": self.metrics.to_dict(),
+            "metric_bands": {
+                metric: {str(p): [float(v) for v in values] for p, values in band.items()}
+                for metric, band in self.metric_bands.items()
+            },
+            "strategy": self.strategy,
+            "timings": self.timings,
+            "profile": self.profile.summary(),
+            "schedule": self.schedule,
+            "artifacts": self.artifact_names
+        }
 
 if __name__ == "__main__":
     import argparse
+    import sys
     parser = argparse.ArgumentParser()
-    parser.add_argument("--product", required=True, help="Product idea to simulate")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--product", help="Product idea to simulate")
+    source.add_argument("--batch", metavar="FILE",
+                        help="File of product ideas, one per line or JSONL with id/product ('-' for stdin)")
+    source.add_argument("--replay", metavar="TRANSCRIPT",
+                        help="Rebuild a recorded run, charts included, without API calls")
+    source.add_argument("--resume", metavar="TRANSCRIPT",
+                        help="Continue a recorded run from where it stopped, appending to its transcript")
+    parser.add_argument("--transcript", metavar="FILE", help="Record every agent call and milestone to a JSONL transcript")
+    parser.add_argument("--concurrency", type=int, default=0,
+                        help="Run tasks concurrently with at most this many LLM calls in flight "
+                             "(default 0: one task and one call at a time)")
+    parser.add_argument("--overlap-milestones", action="store_true",
+                        help="With --concurrency, start tasks before earlier milestones finish when their inputs are ready")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the LLM response cache")
+    parser.add_argument("--batched-prompts", action="store_true",
+                        help="Ask multi-part questions in one structured call instead of one call per part")
+    parser.add_argument("--no-viz", action="store_true", help="Run headless: skip the metrics chart and team graph")
+    parser.add_argument("--no-history", action="store_true", help="Don't store finished runs in the run history")
+    parser.add_argument("--explore", action="store_true",
+                        help="Run up to the strategy decision once, then branch on every development option "
+                             "and print a side-by-side comparison")
+    parser.add_argument("--output", default="batch_results.jsonl",
+                        help="Batch mode: JSONL file to append results to; existing IDs are skipped")
+    parser.add_argument("--parallel", type=int, default=4, help="Batch mode: simulations run at once")
+    parser.add_argument("--artifacts-dir", default=os.path.join("runs", "batch"),
+                        help="Batch mode: directory for per-idea charts")
+    parser.add_argument("--metrics-npz", help="Batch mode: also save all runs' metrics stacked into one .npz")
     args = parser.parse_args()
+    if args.transcript and os.path.exists(args.transcript) and os.path.getsize(args.transcript) > 0:
+        # Recording onto an existing transcript would silently replay it instead of making a new run
+        parser.error(f"{args.transcript} already exists; pass --resume to continue it, --replay to rebuild it, "
+                     "or choose a new file")
+    
+    if args.batch:
+        from batch import read_ideas, run_batch
+        ideas = read_ideas(sys.stdin if args.batch == "-" else open(args.batch, encoding="utf-8"))
+        run_batch(ideas, args.output, parallelism=args.parallel, artifacts_dir=args.artifacts_dir,
+                  max_concurrency=args.concurrency or 4, use_cache=not args.no_cache,
+                  metrics_path=args.metrics_npz, batched_prompts=args.batched_prompts, visualize=not args.no_viz,
+                  history=None if args.no_history else get_history())
+        sys.exit(0)
     
-    sim = StartupSimulation(args.product)
-    sim.run()
\ No newline at end of file
+    options = {"max_concurrency": args.concurrency or 4, "use_cache": not args.no_cache, "visualize": not args.no_viz,
+               "overlap_milestones": args.overlap_milestones, "history": None if args.no_history else get_history()}
+    if args.replay:
+        sim = StartupSimulation.replay(args.replay, **options)
+    elif args.resume:
+        sim = StartupSimulation.resume(args.resume, **options)
+    else:
+        transcript = Transcript(args.transcript) if args.transcript else None
+        sim = StartupSimulation(args.product, batched_prompts=args.batched_prompts, transcript=transcript, **options)
+    if args.explore:
+        from branching import aexplore, compare_branches, explore, format_comparison
+        after = sim.plan.tasks["strategy"].milestone
+        if args.concurrency > 0:
+            branches = asyncio.run(aexplore(sim, after, "strategy", DEVELOPMENT_OPTIONS))
+        else:
+            branches = explore(sim, after, "strategy", DEVELOPMENT_OPTIONS)
+        print("\n" + format_comparison(compare_branches(sim, branches, after)))
+        sys.exit(0)
+    if args.concurrency > 0:
+        asyncio.run(sim.arun())
+    else:
+        sim.run()
+    if sim.cache is not None:
+        stats = sim.cache.stats()
+        print(f"💾 Response cache: {stats['hits']} hits, {stats['misses']} misses")
+    for task, profile in sim.profile.summary().items():
+        print(f"⏱️ {task}: {sim.timings.get(task, 0):.1f}s wall, {profile['calls']} calls "
+              f"({profile['cached']} cached, {profile['retries']} retries), "
+              f"{profile['input_tokens']} in / {profile['output_tokens']} out tokens, "
+              f"slowest call {profile['max_call_seconds']:.1f}s")
+    if sim.schedule.get("critical_path"):
+        print(f"🧭 Critical path: {' → '.join(sim.schedule['critical_path'])} "
+              f"({sim.schedule['critical_path_seconds']:.1f}s)")
\ No newline at end of file
@@ -0,0 +1,193 @@
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# Upper bounds in seconds; LLM calls range from cache hits to long completions
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0)
+MILESTONE_BUCKETS = (1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple:
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple, float] = defaultdict(float)
+
+    def inc(self, amount: float = 1.0, **labels):
+        with self._lock:
+            self._values[self._key(labels)] += amount
+
+    def _samples(self):
+        for key, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_number(value)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: non-cumulative bucket counts (last one is +Inf), sum and count
+        self._series: Dict[Tuple, List] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def _samples(self):
+        for key, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else _format_number(bound)
+                labels = _format_labels(self.labelnames, key, f'le="{le}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_number(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {count}"
+
+
+class Registry:
+    """Process-wide collection of metrics rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self._metrics for line in metric.render()) + "\n"
+
+
+REGISTRY = Registry()
+
+_CALL_LABELS = ("agent", "method", "milestone")
+LLM_CALL_SECONDS = REGISTRY.histogram("sim_llm_call_duration_seconds", "LLM call wall time, including cache lookups",
+                                      _CALL_LABELS + ("cache",))
+LLM_CALLS = REGISTRY.counter("sim_llm_calls_total", "LLM calls by cache outcome", _CALL_LABELS + ("cache",))
+LLM_TOKENS = REGISTRY.counter("sim_llm_tokens_total", "Tokens reported by the API", _CALL_LABELS + ("direction",))
+LLM_RETRIES = REGISTRY.counter("sim_llm_retries_total", "Retried LLM requests", _CALL_LABELS)
+LLM_EARLY_STOPS = REGISTRY.counter("sim_llm_early_stops_total",
+                                   "Streamed responses closed once their generation profile had enough", _CALL_LABELS)
+MILESTONE_SECONDS = REGISTRY.histogram("sim_milestone_duration_seconds", "Milestone wall time", ("milestone",),
+                                       MILESTONE_BUCKETS)
+
+
+def observe_call(event: Dict):
+    """Record a call_end event in the process-wide metrics"""
+    labels = {name: event.get(name) or "" for name in _CALL_LABELS}
+    cache = "hit" if event.get("cached") else "miss"
+    LLM_CALL_SECONDS.observe(event["duration"], cache=cache, **labels)
+    LLM_CALLS.inc(cache=cache, **labels)
+    LLM_TOKENS.inc(event.get("input_tokens", 0), direction="input", **labels)
+    LLM_TOKENS.inc(event.get("output_tokens", 0), direction="output", **labels)
+    if event.get("retries"):
+        LLM_RETRIES.inc(event["retries"], **labels)
+    if event.get("stopped"):
+        LLM_EARLY_STOPS.inc(**labels)
+
+
+def observe_milestone(milestone: str, seconds: float):
+    MILESTONE_SECONDS.observe(seconds, milestone=milestone)
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
+
+
+def _empty_totals() -> Dict:
+    return {"calls": 0, "cached": 0, "retries": 0, "early_stops": 0, "input_tokens": 0, "output_tokens": 0,
+            "call_seconds": 0.0, "max_call_seconds": 0.0}
+
+
+def _add(totals: Dict, event: Dict):
+    totals["calls"] += 1
+    totals["cached"] += bool(event.get("cached"))
+    totals["retries"] += event.get("retries", 0)
+    totals["early_stops"] += bool(event.get("stopped"))
+    totals["input_tokens"] += event.get("input_tokens", 0)
+    totals["output_tokens"] += event.get("output_tokens", 0)
+    totals["call_seconds"] += event["duration"]
+    totals["max_call_seconds"] = max(totals["max_call_seconds"], event["duration"])
+
+
+class RunProfile:
+    """Per-milestone rollup of one simulation's LLM calls, broken down by agent.
+
+    call_seconds sums call durations, so with concurrent calls it can exceed the
+    milestone's wall time; max_call_seconds bounds the critical path from below.
+    """
+
+    def __init__(self):
+        self._milestones: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def add(self, event: Dict):
+        milestone = event.get("milestone") or "unassigned"
+        with self._lock:
+            entry = self._milestones.get(milestone)
+            if entry is None:
+                entry = self._milestones[milestone] = {**_empty_totals(), "agents": {}}
+            _add(entry, event)
+            agent = entry["agents"].setdefault(event.get("agent") or "unknown", _empty_totals())
+            _add(agent, event)
+
+    def summary(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {milestone: {**entry, "agents": {agent: dict(totals) for agent, totals in entry["agents"].items()}}
+                    for milestone, entry in self._milestones.items()}
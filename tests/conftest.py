@@ -0,0 +1,63 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+
+import httpx
+import pytest
+
+# Agents read their limits and cache location at import time; keep tests local and unthrottled
+_scratch = tempfile.mkdtemp(prefix="sim-tests-")
+os.environ.update(ANTHROPIC_API_KEY="fake-key", SIM_REQUESTS_PER_MINUTE="1000000",
+                  SIM_TOKENS_PER_MINUTE="1000000000", SIM_MONTE_CARLO_RUNS="500",
+                  SIM_CACHE_DIR=os.path.join(_scratch, "cache"),
+                  SIM_HISTORY_DB=os.path.join(_scratch, "history.sqlite3"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Imported after the environment is set, since the agents read it at import time
+from agents.client import use_transport
+from bench.fake_anthropic import FakeConfig, FakeMessagesAPI
+
+
+class TrackingAPI(FakeMessagesAPI):
+    """Fake Messages API that keeps every prompt and the most requests it had in flight at once"""
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.prompts = []
+        self.active = 0
+        self.peak = 0
+        self._count_lock = threading.Lock()
+
+    def _enter(self, body: bytes):
+        with self._count_lock:
+            self.prompts.append(json.loads(body)["messages"][-1]["content"])
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+
+    def _leave(self):
+        with self._count_lock:
+            self.active -= 1
+
+    def handle(self, request):
+        self._enter(request.read())
+        try:
+            return super().handle(request)
+        finally:
+            self._leave()
+
+    async def ahandle(self, request):
+        self._enter(await request.aread())
+        try:
+            return await super().ahandle(request)
+        finally:
+            self._leave()
+
+
+@pytest.fixture
+def fake_api():
+    api = TrackingAPI(FakeConfig(latency=0.01, jitter=0.0, output_tokens=40))
+    use_transport(httpx.MockTransport(api.handle), httpx.MockTransport(api.ahandle))
+    yield api
+    use_transport(None, None)
@@ -0,0 +1,37 @@
+import numpy as np
+
+from branching import compare_branches
+from events import NullSink
+from sim import DEVELOPMENT_OPTIONS, StartupSimulation
+
+
+def test_branches_with_different_strategies_diverge_in_isolation(fake_api):
+    sim = StartupSimulation("test idea", use_cache=False, output_dir=None, event_sink=NullSink(), visualize=False)
+    after = sim.plan.tasks["strategy"].milestone
+    sim.run(until=after)
+    outputs = {milestone: dict(values) for milestone, values in sim.outputs.items()}
+    memory = [len(agent.memory) for agent in sim.agents]
+
+    suffixes = {}
+    branches = {}
+    for option in DEVELOPMENT_OPTIONS[:2]:
+        branch = sim.fork({"strategy": option}, name=option)
+        sent = len(fake_api.prompts)
+        branch.run()
+        suffixes[option] = fake_api.prompts[sent:]
+        branches[option] = branch
+
+    first, second = suffixes.values()
+    assert first and len(first) == len(second)
+    assert set(first).isdisjoint(second)
+    assert all(any(option in prompt for prompt in suffixes[option]) for option in suffixes)
+    assert [branch.strategy for branch in branches.values()] == DEVELOPMENT_OPTIONS[:2]
+
+    # The parent stays where it was forked
+    assert sim.outputs == outputs
+    assert [len(agent.memory) for agent in sim.agents] == memory
+    assert all(np.isnan(values).all() for _, values in sim.metrics.items())
+
+    report = compare_branches(sim, branches, after)
+    decisions = [branch["outputs"]["Launch & analytics"]["decision"] for branch in report["branches"].values()]
+    assert decisions[0] != decisions[1]
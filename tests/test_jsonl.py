@@ -0,0 +1,18 @@
+import json
+
+from agents.jsonl import open_append, read_records
+
+
+def test_append_after_truncated_line(tmp_path):
+    path = tmp_path / "runs.jsonl"
+    path.write_text('{"id": "a"}\n{"id": "b', encoding="utf-8")
+    with open_append(str(path)) as f:
+        f.write(json.dumps({"id": "c"}) + "\n")
+    assert list(read_records(str(path))) == [{"id": "a"}, {"id": "c"}]
+
+
+def test_open_append_creates_parent_directories(tmp_path):
+    path = tmp_path / "nested" / "runs.jsonl"
+    with open_append(str(path)) as f:
+        f.write("{}\n")
+    assert list(read_records(str(path))) == [{}]
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from metrics_store import MetricsStore
+
+
+def _store():
+    store = MetricsStore(["users", "revenue"], days=5)
+    for day in range(1, 6):
+        store.append("users", day, day * 10.0)
+    store.append("revenue", 2, 5.0)
+    return store
+
+
+def test_slice_keeps_day_numbers():
+    window = _store().slice(3, 4)
+    assert window.days.tolist() == [3, 4]
+    assert window["users"].tolist() == [30.0, 40.0]
+    assert window.to_dict()["days"] == [3, 4]
+    assert window.slice(4).days.tolist() == [4]
+
+
+def test_slice_writes_by_day_number():
+    store = _store()
+    window = store.slice(3)
+    window.append("users", 4, -1.0)
+    assert store["users"][3] == -1.0
+    with pytest.raises(IndexError):
+        window.append("users", 2, 0.0)
+
+
+def test_fork_is_copy_on_write():
+    parent = _store()
+    child = parent.fork()
+    assert np.shares_memory(parent._data["users"], child._data["users"])
+    child.append("users", 1, 99.0)
+    parent.set_series("revenue", [1.0, 2.0])
+    assert parent["users"][0] == 10.0
+    assert child["users"][0] == 99.0
+    assert np.isnan(child["revenue"][0])
+    assert child["revenue"][1] == 5.0
+    assert parent["revenue"][:2].tolist() == [1.0, 2.0]
+
+
+def test_nan_round_trips_through_dict():
+    data = _store().slice(2).to_dict()
+    assert data["revenue"] == [5.0, None, None, None]
+    restored = MetricsStore.from_dict(data)
+    assert restored.days.tolist() == [2, 3, 4, 5]
+    assert restored["revenue"][0] == 5.0
+    assert np.isnan(restored["revenue"][1:]).all()
+    assert restored.to_dict() == data
+
+
+def test_npz_keeps_first_day(tmp_path):
+    path = tmp_path / "metrics.npz"
+    _store().slice(3).to_npz(path)
+    restored = MetricsStore.from_npz(path)
+    assert restored.columns == ["users", "revenue"]
+    assert restored.days.tolist() == [3, 4, 5]
+
+
+def test_growing_exposes_only_days_in_use(tmp_path):
+    store = MetricsStore(["users"], days=30)
+    store.append("users", 31, 1.0)
+    assert store.days.tolist() == list(range(1, 32))
+    assert len(store.to_dict()["users"]) == 31
+    store.append("users", 32, 2.0)
+    assert store["users"][-2:].tolist() == [1.0, 2.0]
+
+    other = MetricsStore(["users"], days=32)
+    stacked = MetricsStore.concat([store, other])
+    assert stacked["users"].shape == (2, 32)
+
+    path = tmp_path / "metrics.npz"
+    store.to_npz(path)
+    assert MetricsStore.from_npz(path).days.tolist() == list(range(1, 33))
+
+
+def test_slice_of_a_fork_keeps_the_parent_isolated():
+    parent = _store()
+    child = parent.fork()
+    child.slice(2, 3).append("users", 2, -5.0)
+    assert parent["users"][1] == 20.0
+    parent.slice(2).append("revenue", 3, 7.0)
+    assert np.isnan(child["revenue"][2])
@@ -0,0 +1,23 @@
+from montecarlo import strategy_from_decision
+from sim import DEVELOPMENT_OPTIONS
+
+
+def test_decision_line_wins_over_an_option_rejected_first():
+    decision = ("Decision: Focus on quick MVP\n"
+                "While Build robust architecture is tempting, speed to market matters more now.")
+    assert strategy_from_decision(decision, DEVELOPMENT_OPTIONS) == "Focus on quick MVP"
+
+
+def test_paraphrased_decision():
+    assert strategy_from_decision("I recommend focusing on a quick MVP.", DEVELOPMENT_OPTIONS) == "Focus on quick MVP"
+    assert strategy_from_decision("**Decision:** outsource it", DEVELOPMENT_OPTIONS) == "Outsource development"
+
+
+def test_free_text_weighing_several_options_is_ambiguous():
+    decision = "While Build robust architecture is tempting, I recommend we Focus on quick MVP."
+    assert strategy_from_decision(decision, DEVELOPMENT_OPTIONS) is None
+
+
+def test_exact_option_and_no_option():
+    assert strategy_from_decision("Build robust architecture", DEVELOPMENT_OPTIONS) == "Build robust architecture"
+    assert strategy_from_decision("Let's wait and see.", DEVELOPMENT_OPTIONS) is None
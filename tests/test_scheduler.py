@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from events import NullSink
+from scheduler import MilestonePlan, Scheduler
+from sim import StartupSimulation, default_plan
+
+
+def _simulation(**kwargs):
+    return StartupSimulation("test idea", use_cache=False, output_dir=None, event_sink=NullSink(),
+                             visualize=False, **kwargs)
+
+
+def _tracked(log, delay=0.01):
+    async def execute(task, inputs):
+        log.append(("start", task.name))
+        await asyncio.sleep(delay)
+        log.append(("end", task.name))
+        return task.name
+    return execute
+
+
+def test_serial_scheduler_runs_one_task_at_a_time():
+    plan = MilestonePlan()
+    plan.add_milestone("Day 1", "first")
+    for name in ("a", "b", "c"):
+        plan.add_task("first", name, None)
+    log = []
+    results = asyncio.run(Scheduler(plan, parallel=False).run(_tracked(log)))
+    assert results == {"a": "a", "b": "b", "c": "c"}
+    assert log == [("start", "a"), ("end", "a"), ("start", "b"), ("end", "b"), ("start", "c"), ("end", "c")]
+
+
+def test_serial_run_makes_one_call_at_a_time(fake_api):
+    _simulation(max_concurrency=8).run()
+    assert fake_api.requests > 1
+    assert fake_api.peak == 1
+
+
+def test_run_refuses_a_running_event_loop(fake_api):
+    async def nested():
+        _simulation().run()
+
+    with pytest.raises(RuntimeError, match="arun"):
+        asyncio.run(nested())
+
+
+def _spans(log):
+    position = {event: i for i, event in enumerate(log)}
+    return {name: (position[("start", name)], position[("end", name)]) for _, name in log}
+
+
+@pytest.mark.parametrize("overlap", [False, True])
+def test_default_plan_decides_after_the_launch(overlap):
+    log = []
+    asyncio.run(Scheduler(default_plan(), overlap_milestones=overlap).run(_tracked(log)))
+    spans = _spans(log)
+    for before, after in [("projection", "decision"), ("launch_dialogue", "decision"),
+                          ("feedback", "launch_dialogue"), ("tech_stack", "effort_estimates")]:
+        assert spans[before][1] < spans[after][0], f"{after} started before {before} finished"
+
+
+def test_milestones_run_in_order_by_default():
+    plan = default_plan()
+    log = []
+    asyncio.run(Scheduler(plan).run(_tracked(log)))
+    spans = _spans(log)
+    milestones = plan.milestone_names
+    for task in plan.tasks.values():
+        rank = milestones.index(task.milestone)
+        for earlier in plan.tasks.values():
+            if milestones.index(earlier.milestone) < rank:
+                assert spans[earlier.name][1] < spans[task.name][0]
+
+
+def test_overlap_lets_independent_tasks_run_ahead():
+    log = []
+    asyncio.run(Scheduler(default_plan(), overlap_milestones=True).run(_tracked(log)))
+    spans = _spans(log)
+    # The projection only needs the strategy, so it runs while the MVP is still being estimated
+    assert spans["projection"][0] < spans["effort_estimates"][1]
+
+
+def test_dependency_on_a_later_milestone_needs_overlap():
+    plan = MilestonePlan()
+    plan.add_milestone("Day 1", "first")
+    plan.add_milestone("Day 2", "second")
+    plan.add_task("first", "early", None, deps=["late"])
+    plan.add_task("second", "late", None)
+    with pytest.raises(ValueError, match="later milestone"):
+        Scheduler(plan)
+    assert [task.name for task in Scheduler(plan, overlap_milestones=True).order] == ["late", "early"]
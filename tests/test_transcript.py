@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from agents.transcript import ReplayMismatch, Transcript
+from events import NullSink
+from sim import StartupSimulation, default_plan
+
+OPTIONS = {"use_cache": False, "output_dir": None, "event_sink": NullSink(), "visualize": False}
+
+
+@pytest.fixture
+def recorded(fake_api, tmp_path):
+    path = str(tmp_path / "run.jsonl")
+    result = StartupSimulation("test idea", transcript=Transcript(path), **OPTIONS).run()
+    return path, result, len(fake_api.prompts)
+
+
+def test_replay_makes_no_calls_and_rebuilds_the_run(recorded, fake_api):
+    path, result, _ = recorded
+    sent = len(fake_api.prompts)
+    replayed = StartupSimulation.replay(path, **OPTIONS).run()
+    assert len(fake_api.prompts) == sent
+    assert replayed["outputs"] == result["outputs"]
+    assert replayed["metrics"] == result["metrics"]
+
+
+def test_resume_makes_only_the_remaining_calls(recorded, fake_api):
+    path, result, calls = recorded
+    with open(path, encoding="utf-8") as f:
+        lines = f.readlines()
+    cut = next(i for i, line in enumerate(lines) if json.loads(line)["type"] == "milestone") + 1
+    done = sum(json.loads(line)["type"] == "call" for line in lines[:cut])
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(lines[:cut])
+
+    sent = len(fake_api.prompts)
+    resumed = StartupSimulation.resume(path, **OPTIONS).run()
+    assert len(fake_api.prompts) - sent == calls - done
+    first = next(iter(result["outputs"]))
+    assert resumed["outputs"][first] == result["outputs"][first]
+    assert Transcript(path, strict=True).finished
+
+
+def test_replay_raises_when_the_run_diverges(recorded):
+    path, _, _ = recorded
+    plan = default_plan()
+
+    @plan.task("Launch & analytics", deps=["decision"])
+    async def pitch(sim, decision):
+        return await sim.ceo.athink(f"Write an investor pitch given: {decision}")
+
+    with pytest.raises(ReplayMismatch):
+        StartupSimulation.replay(path, plan=plan, **OPTIONS).run()
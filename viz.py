@@ -1,75 +1,169 @@
-import matplotlib.pyplot as plt
 import numpy as np
+import hashlib
+import io
+import json
 import os
-from typing import Dict, List, Tuple
+import threading
+from typing import TYPE_CHECKING, Dict, Iterable, Optional
+from metrics_store import MetricsStore
+
+# matplotlib is imported on first render, so headless runs and the API server never load it
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+# Figures are private to each call, but matplotlib's font and text caches are
+# shared module state, so renders are serialized
+_render_lock = threading.Lock()
+
+MEDIA_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+# The team graph only depends on agent_info, so renders are memoized in memory and on disk
+GRAPH_CACHE_DIR = os.path.join(os.getenv("SIM_CACHE_DIR", ".cache"), "graphs")
+_graph_cache: Dict[str, bytes] = {}
+_graph_cache_lock = threading.Lock()
+
+def graph_cache_key(agents_info: Dict[str, Dict], fmt: str) -> str:
+    """Stable hash of the agent structure and output format"""
+    encoded = json.dumps({"agents": agents_info, "format": fmt}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+def _new_figure(**kwargs) -> "Figure":
+    from matplotlib.figure import Figure
+    return Figure(**kwargs)
+
+def _figure_bytes(fig: "Figure", fmt: str) -> bytes:
+    """Render a figure to bytes and release it"""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    try:
+        FigureCanvasAgg(fig)
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=fmt)
+        return buffer.getvalue()
+    finally:
+        fig.clear()
+
+def _write(data: bytes, output_dir: str, name: str) -> str:
+    path = os.path.join(output_dir, name)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
 
 class SimulationVisualizer:
     """Visualization tools for the startup simulation"""
-    
+
     @staticmethod
-    def create_agent_relationship_graph(agents_info: Dict[str, Dict]):
-        """Create a graph visualization of agent relationships"""
-        try:
-            import graphviz as gv
-            dot = gv.Digraph(comment='Startup Team Dynamics')
-            
-            for agent_id, info in agents_info.items():
-                dot.node(agent_id, f"{info['name']}\n{info['role']}")
-            
-            for agent_id, info in agents_info.items():
-                for relation in info.get('relations', []):
-                    dot.edge(agent_id, relation['to'], label=relation['type'])
-            
-            try:
-                dot.render('agent_relationships', format='png', cleanup=True)
-                return 'agent_relationships.png'
-            except Exception as e:
-                print(f"Error rendering graph: {e}")
-                return _create_fallback_relationship_image(agents_info)
-        except (ImportError, Exception) as e:
-            print(f"Graphviz error: {e}")
-            return _create_fallback_relationship_image(agents_info)
+    def render_agent_relationship_graph(agents_info: Dict[str, Dict], fmt: str = "png") -> bytes:
+        """Render a graph of agent relationships to image bytes, reusing earlier renders"""
+        key = graph_cache_key(agents_info, fmt)
+        with _graph_cache_lock:
+            data = _graph_cache.get(key)
+        if data is not None:
+            return data
+
+        path = os.path.join(GRAPH_CACHE_DIR, f"{key}.{fmt}")
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                data = f.read()
+        else:
+            data, rendered_by_graphviz = _render_relationship_graph(agents_info, fmt)
+            # Fallback images are not persisted so installing Graphviz later takes effect
+            if rendered_by_graphviz:
+                os.makedirs(GRAPH_CACHE_DIR, exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+
+        with _graph_cache_lock:
+            _graph_cache[key] = data
+        return data
 
     @staticmethod
-    def plot_startup_metrics(metrics: Dict[str, List[Tuple[str, float]]]):
-        """Plot metrics over time using matplotlib"""
-        fig, axs = plt.subplots(len(metrics), 1, figsize=(10, 3*len(metrics)))
-        
-        for i, (metric_name, data_points) in enumerate(metrics.items()):
-            days = [point[0] for point in data_points]
-            values = [point[1] for point in data_points]
-            
-            if len(metrics) > 1:
-                ax = axs[i]
-            else:
-                ax = axs
-                
-            ax.plot(days, values, marker='o')
-            ax.set_title(f'{metric_name} Over Time')
-            ax.set_xlabel('Timeline')
-            ax.set_ylabel(metric_name)
-            ax.grid(True)
-        
-        plt.tight_layout()
-        plt.savefig('startup_metrics.png')
-        return 'startup_metrics.png'
-
-def _create_fallback_relationship_image(agents_info):
+    def warm_graph_cache(agents_info: Dict[str, Dict], formats: Iterable[str] = ("png",)):
+        """Render the team graph ahead of time, e.g. at server startup"""
+        for fmt in formats:
+            SimulationVisualizer.render_agent_relationship_graph(agents_info, fmt)
+
+    @staticmethod
+    def render_startup_metrics(metrics: MetricsStore,
+                               bands: Optional[Dict[str, Dict[int, np.ndarray]]] = None,
+                               fmt: str = "png") -> bytes:
+        """Plot metrics over time to image bytes, with percentile bands when given"""
+        days = metrics.days
+
+        with _render_lock:
+            fig = _new_figure(figsize=(10, 3*len(metrics)))
+            axs = fig.subplots(len(metrics), 1, squeeze=False)[:, 0]
+            for ax, (metric_name, values) in zip(axs, metrics.items()):
+                band = (bands or {}).get(metric_name)
+                if band:
+                    ax.fill_between(days, band[5], band[95], color='C0', alpha=0.15, label='5th-95th percentile')
+                    ax.fill_between(days, band[25], band[75], color='C0', alpha=0.3, label='25th-75th percentile')
+                    ax.plot(days, band[50], color='C0', label='Median')
+                    ax.legend(loc='upper left', fontsize='small')
+                else:
+                    # Skip days with no recorded value instead of breaking the line
+                    recorded = ~np.isnan(values)
+                    ax.plot(days[recorded], values[recorded], marker='o')
+                ax.set_title(f'{metric_name} Over Time')
+                ax.set_xlabel('Day')
+                ax.set_ylabel(metric_name)
+                ax.grid(True)
+
+            fig.tight_layout()
+            return _figure_bytes(fig, fmt)
+
+    @staticmethod
+    def create_agent_relationship_graph(agents_info: Dict[str, Dict], output_dir: str = ".", fmt: str = "png"):
+        """Create a graph visualization of agent relationships and save it under output_dir"""
+        data = SimulationVisualizer.render_agent_relationship_graph(agents_info, fmt)
+        return _write(data, output_dir, f"agent_relationships.{fmt}")
+
+    @staticmethod
+    def plot_startup_metrics(metrics: MetricsStore, output_dir: str = ".",
+                             bands: Optional[Dict[str, Dict[int, np.ndarray]]] = None, fmt: str = "png"):
+        """Plot metrics over time and save the chart under output_dir"""
+        data = SimulationVisualizer.render_startup_metrics(metrics, bands, fmt)
+        return _write(data, output_dir, f"startup_metrics.{fmt}")
+
+def _render_relationship_graph(agents_info, fmt="png"):
+    """Render the team graph with Graphviz; returns (bytes, rendered_by_graphviz)"""
+    try:
+        import graphviz as gv
+        dot = gv.Digraph(comment='Startup Team Dynamics')
+
+        for agent_id, info in agents_info.items():
+            dot.node(agent_id, f"{info['name']}\n{info['role']}")
+
+        for agent_id, info in agents_info.items():
+            for relation in info.get('relations', []):
+                dot.edge(agent_id, relation['to'], label=relation['type'])
+
+        try:
+            return dot.pipe(format=fmt), True
+        except Exception as e:
+            print(f"Error rendering graph: {e}")
+            return _render_fallback_relationship_image(agents_info, fmt), False
+    except (ImportError, Exception) as e:
+        print(f"Graphviz error: {e}")
+        return _render_fallback_relationship_image(agents_info, fmt), False
+
+def _render_fallback_relationship_image(agents_info, fmt="png"):
     """Create a fallback image for agent relationships when graphviz is unavailable"""
-    fig, ax = plt.subplots(figsize=(8, 6))
-    
-    ax.axis('off')
-    
-    ax.set_title('Startup Team Dynamics')
-    
-
-    text = "Team Structure:\n\n"
-    for agent_id, info in agents_info.items():
-        text += f"• {info['name']} ({info['role']})\n"
-        for relation in info.get('relations', []):
-            text += f"  → {relation['type']} {relation['to']}\n"
-    
-    ax.text(0.1, 0.5, text, fontsize=12, va='center')
-    
-    plt.savefig('agent_relationships.png')
-    return 'agent_relationships.png'
\ No newline at end of file
+    with _render_lock:
+        fig = _new_figure(figsize=(8, 6))
+        ax = fig.subplots()
+
+        ax.axis('off')
+
+        ax.set_title('Startup Team Dynamics')
+
+        text = "Team Structure:\n\n"
+        for agent_id, info in agents_info.items():
+            text += f"• {info['name']} ({info['role']})\n"
+            for relation in info.get('relations', []):
+                text += f"  → {relation['type']} {relation['to']}\n"
+
+        ax.text(0.1, 0.5, text, fontsize=12, va='center')
+
+        return _figure_bytes(fig, fmt)